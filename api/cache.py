@@ -0,0 +1,123 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with per-entry TTL and stale-while-revalidate.
+
+    An entry is "fresh" until its TTL runs out, then "stale" for another `stale_ttl`
+    seconds. Stale entries are still served by `get_or_load` while a background task
+    refreshes them; past the stale window they count as a miss.
+    """
+
+    def __init__(self, max_size=512, ttl=300.0, stale_ttl=3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data = OrderedDict() # key -> (value, fresh_until, stale_until)
+        self._refreshing = {} # key -> background refresh task
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Return (value, state) where state is "fresh", "stale" or None for a miss."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, None
+
+        value, fresh_until, stale_until = entry
+        now = time.monotonic()
+        if now >= stale_until:
+            # Left in place (until LRU eviction or overwrite) as a last resort for last_known()
+            self.expirations += 1
+            self.misses += 1
+            return None, None
+
+        self._data.move_to_end(key)
+        if now < fresh_until:
+            self.hits += 1
+            return value, "fresh"
+        self.stale_hits += 1
+        return value, "stale"
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        self._data[key] = (value, now + ttl, now + ttl + self.stale_ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def last_known(self, key):
+        """Whatever value is stored for `key`, however old; for when upstream is down."""
+        entry = self._data.get(key)
+        return entry[0] if entry is not None else None
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    async def get_or_load(self, key, loader, ttl=None):
+        """
+        Serve `key` from cache, calling the async `loader()` on a miss.
+
+        Stale hits return immediately and schedule one background refresh per key.
+        Falsy results (e.g. an empty list after an upstream error) are not cached.
+        """
+        value, state = self.get(key)
+        if state == "fresh":
+            return value
+        if state == "stale":
+            self._refresh_in_background(key, loader, ttl)
+            return value
+
+        value = await loader()
+        if value:
+            self.set(key, value, ttl)
+        return value
+
+    def prefetch(self, key, loader, ttl=None):
+        """Load `key` in the background unless a fresh entry is already cached (or loading)."""
+        entry = self._data.get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            return
+        self._refresh_in_background(key, loader, ttl)
+
+    def _refresh_in_background(self, key, loader, ttl):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                value = await loader()
+                if value:
+                    self.set(key, value, ttl)
+            except Exception as e:
+                print(f"Cache Refresh Error: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "refreshing": len(self._refreshing),
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
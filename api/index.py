@@ -1,53 +1,132 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from typing import Dict, List, Optional
+import time
+from contextlib import contextmanager
+
+class StartupTimer:
+    """Per-import and per-phase cold start timings, reported on /api/health."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = {}
+        self.phases = {}
+
+    @contextmanager
+    def _measure(self, bucket, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            bucket[name] = round((time.perf_counter() - t) * 1000, 2)
+
+    def imported(self, name):
+        return self._measure(self.imports, name)
+
+    def phase(self, name):
+        return self._measure(self.phases, name)
+
+    def mark_ready(self):
+        self.phases.setdefault("module_ready", round((time.perf_counter() - self.started) * 1000, 2))
+
+    def report(self):
+        return {"imports_ms": self.imports, "phases_ms": self.phases}
+
+startup = StartupTimer()
+
+with startup.imported("fastapi"):
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import FileResponse, Response, StreamingResponse
+with startup.imported("pydantic"):
+    from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional
 import os
 import uuid
-import requests
 import sys
 import traceback
-from mangum import Mangum
 
 app = FastAPI()
 
 # Global state to capture startup errors
 startup_error = None
 jio_client = None
+stations = None
+image_cache = None
+tracks_response = shelves_response = cache_control = None
+ndjson_tracks = None
+encode_cursor = decode_cursor = None
 DOWNLOAD_DIR = "/tmp/downloads"
 
 # 1. Setup Filesystem
-try:
-    # Use /tmp for Vercel always to be safe
-    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-except Exception as e:
-    startup_error = f"FS Error: {str(e)}"
+with startup.phase("filesystem"):
+    try:
+        # Use /tmp for Vercel always to be safe
+        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    except Exception as e:
+        startup_error = f"FS Error: {str(e)}"
 
 # 2. Setup Sys Path for Imports
-try:
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    if current_dir not in sys.path:
-        sys.path.append(current_dir)
-    # Also add parent for good measure if needed
-    parent_dir = os.path.join(current_dir, '..')
-    if parent_dir not in sys.path:
-        sys.path.append(parent_dir)
-except Exception as e:
-    startup_error = f"Path Error: {str(e)}"
+with startup.phase("sys_path"):
+    try:
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        if current_dir not in sys.path:
+            sys.path.append(current_dir)
+        # Also add parent for good measure if needed
+        parent_dir = os.path.join(current_dir, '..')
+        if parent_dir not in sys.path:
+            sys.path.append(parent_dir)
+    except Exception as e:
+        startup_error = f"Path Error: {str(e)}"
+
+# Stdlib only, so it is cheap enough to load at import time
+with startup.imported("metrics"):
+    try:
+        from metrics import metrics, ServerTimingMiddleware
+    except ImportError:
+        from api.metrics import metrics, ServerTimingMiddleware
 
 # 3. Import JioSaavn Client (Fault Tolerant)
-if not startup_error:
+# Deferred to the first request that needs it so cold starts only pay for FastAPI.
+# Set EAGER_STARTUP=1 to build it at import time instead (e.g. behind a warmer).
+def get_client():
+    global jio_client, stations, image_cache, tracks_response, shelves_response, cache_control, ndjson_tracks, encode_cursor, decode_cursor, startup_error
+    if jio_client is not None or startup_error:
+        return jio_client
     try:
-        # Try importing from same directory first (Vercel structure)
-        try:
-            from jiosaavn_client import JioSaavnClient
-        except ImportError:
-            from api.jiosaavn_client import JioSaavnClient
-            
-        jio_client = JioSaavnClient()
+        with startup.imported("jiosaavn_client"):
+            # Try importing from same directory first (Vercel structure)
+            try:
+                from jiosaavn_client import AsyncJioSaavnClient, encode_cursor, decode_cursor
+                from stations import StationRegistry
+                from images import ImageCache
+                from serialization import tracks_response, shelves_response, ndjson_tracks, cache_control
+            except ImportError:
+                from api.jiosaavn_client import AsyncJioSaavnClient, encode_cursor, decode_cursor
+                from api.stations import StationRegistry
+                from api.images import ImageCache
+                from api.serialization import tracks_response, shelves_response, ndjson_tracks, cache_control
+
+        with startup.phase("client_init"):
+            # Persistent tier in /tmp survives across invocations of a warm container
+            client = AsyncJioSaavnClient.from_env(persistent_path=os.path.join(DOWNLOAD_DIR, "cache", "jiosaavn.sqlite3"))
+            # Sessions only live as long as the warm container, which is fine for a queue
+            stations = StationRegistry(client.get_recommendations)
+            image_cache = ImageCache(
+                os.path.join(DOWNLOAD_DIR, "images"),
+                max_bytes=int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(64 * 1024 ** 2))),
+            )
+            jio_client = client
+            metrics.gauge("cache_hit_ratio", lambda: client.cache.stats()["hit_ratio"], cache="search")
+            metrics.gauge("cache_hit_ratio", lambda: client.tracks.stats()["hit_ratio"], cache="tracks")
+            metrics.gauge("cache_entries", lambda: client.cache.stats()["size"], cache="search")
+            metrics.gauge("singleflight_in_flight", lambda: client.flight.stats()["in_flight"])
+            metrics.gauge("upstream_concurrency_limit", lambda: client.guard.limiter.stats()["limit"])
+            metrics.gauge("upstream_in_flight", lambda: client.guard.limiter.in_flight)
+            metrics.gauge("upstream_circuit_open", lambda: int(not client.guard.healthy))
     except Exception as e:
         startup_error = f"Import/Init Error: {str(e)}\n{traceback.format_exc()}"
+    return jio_client
+
+if os.getenv("EAGER_STARTUP") == "1":
+    get_client()
 
 
 # Enable CORS
@@ -56,14 +135,21 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Next-Cursor"],
 )
 
+# Outermost, so Server-Timing covers the whole request (METRICS_ENABLED=0 disables)
+app.add_middleware(ServerTimingMiddleware, metrics=metrics)
+
 @app.get("/api/health")
 async def health_check():
     # If there was a startup error, return it here so we can debug!
     if startup_error:
-        return {"status": "error", "detail": startup_error}
-    return {"status": "ok", "backend": "active", "client_initialized": jio_client is not None}
+        return {"status": "error", "detail": startup_error, "startup": startup.report()}
+    # "degraded" while the upstream circuit is open: cached listings only, new lookups fail fast
+    upstream = jio_client.guard.stats() if jio_client is not None else None
+    status = "degraded" if upstream and not upstream["healthy"] else "ok"
+    return {"status": status, "backend": "active", "client_initialized": jio_client is not None, "upstream": upstream, "startup": startup.report()}
 
 # --- Standard Endpoints ---
 
@@ -80,70 +166,173 @@ class SearchResult(BaseModel):
     thumbnail: str
     videoId: str
     streamUrl: Optional[str] = None
+    streamToken: Optional[str] = None # Opaque; exchange for a streamUrl via /api/resolve
+    artwork: Optional[Dict[str, str]] = None # /api/image paths per UI slot ("thumb", "card")
+
+# Stream bitrate in kbps; "auto" picks from the client's `bandwidth` hint (kbps) and checks the CDN has it
+Quality = Literal["96", "160", "320", "auto"]
+
+def page_args(cursor: Optional[str], size: int):
+    # The cursor carries page and size; without one this is the first page
+    if cursor:
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return 1, max(1, min(size, 50))
+
+def paged_response(results, page: int, size: int, request: Request, cache: str):
+    # The body stays a plain list; the next page is advertised in a header (absent on the last page)
+    response = tracks_response(results, request, cache)
+    if len(results) >= size:
+        response.headers["X-Next-Cursor"] = encode_cursor(page + 1, size)
+    return response
+
+def ndjson_response(tracks, page: int, size: int, cache: str):
+    # Kept for API compatibility, but Mangum buffers it: nothing reaches the client before
+    # the last line, so the web client uses the JSON + X-Next-Cursor form here (lib/api.ts)
+    next_cursor = lambda count: encode_cursor(page + 1, size) if count >= size else None
+    return StreamingResponse(ndjson_tracks(tracks, next_cursor), media_type="application/x-ndjson", headers={"Cache-Control": cache})
+
+# Per-route Cache-Control. Browsers revalidate quickly (a 304 against the ETag); the edge
+# keeps listings as long as our own cache does and serves them stale while it refetches.
+def charts_cache():
+    return cache_control(60, jio_client.chart_ttl, jio_client.cache.stale_ttl)
+
+def search_cache():
+    return cache_control(30, jio_client.search_ttl, 600)
+
+SUGGEST_CACHE = "public, max-age=30, s-maxage=60"
+RECOMMENDATIONS_CACHE = "private, max-age=60" # Per listener; never shared
+QUEUE_CACHE = "no-store" # Every call advances the station
 
 @app.get("/api/search", response_model=List[SearchResult])
-async def search_music(query: str):
-    if not jio_client:
+async def search_music(request: Request, query: str, cursor: Optional[str] = None, size: int = 20, format: str = "json"):
+    if not get_client():
         raise HTTPException(status_code=503, detail=f"Backend Not Ready: {startup_error}")
+    # format=ndjson streams one track per line, ending with {"nextCursor": ...}
+    page, size = page_args(cursor, size)
+    if format == "ndjson":
+        return ndjson_response(jio_client.stream_search(query, page, size, prefetch=True), page, size, search_cache())
     try:
-        results = jio_client.search_songs(query)
-        serialized_results = []
-        for r in results:
-            serialized_results.append(SearchResult(
-                title=r.get('title', 'Unknown'),
-                artist=r.get('artist', ''),
-                album=r.get('album', ''),
-                thumbnail=r.get('thumbnail', ''),
-                videoId=r.get('id'),
-                streamUrl=r.get('streamUrl')
-            ))
-        return serialized_results
+        results = await jio_client.search_songs(query, page, size, prefetch=True)
+        return paged_response(results, page, size, request, search_cache())
     except Exception as e:
         print(f"Search Error: {e}")
         raise HTTPException(status_code=500, detail="Search failed")
 
+@app.get("/api/charts/batch")
+async def get_chart_shelves(request: Request, categories: Optional[str] = None, size: int = 20):
+    # One invocation for the whole Home page instead of one per shelf
+    if not get_client():
+        raise HTTPException(status_code=503, detail=f"Backend Not Ready: {startup_error}")
+    names = [c for c in (categories or "").split(",") if c][:12] or None
+    try:
+        shelves = await jio_client.get_chart_shelves(names, max(1, min(size, 50)))
+        return shelves_response(shelves, request, charts_cache())
+    except Exception as e:
+        print(f"Charts Batch Error: {e}")
+        return {"shelves": []}
+
 @app.get("/api/charts", response_model=List[SearchResult])
-async def get_charts(category: str = "all"):
-    if not jio_client:
-         raise HTTPException(status_code=503, detail=f"Backend Not Ready: {startup_error}")
+async def get_charts(request: Request, category: str = "all", cursor: Optional[str] = None, size: int = 20, format: str = "json"):
+    if not get_client():
+        raise HTTPException(status_code=503, detail=f"Backend Not Ready: {startup_error}")
+    page, size = page_args(cursor, size)
+    if format == "ndjson":
+        return ndjson_response(jio_client.stream_charts(category, page, size, prefetch=True), page, size, charts_cache())
     try:
-        results = jio_client.get_charts(category)
-        serialized_results = []
-        for r in results:
-            serialized_results.append(SearchResult(
-                title=r.get('title', 'Unknown'),
-                artist=r.get('artist', ''),
-                album=r.get('album', ''),
-                thumbnail=r.get('thumbnail', ''),
-                videoId=r.get('id'),
-                streamUrl=r.get('streamUrl')
-            ))
-        return serialized_results
+        results = await jio_client.get_charts(category, page, size, prefetch=True)
+        return paged_response(results, page, size, request, charts_cache())
     except Exception as e:
         print(f"Charts Error: {e}")
         return []
 
+@app.get("/api/suggest", response_model=List[SearchResult])
+async def suggest(request: Request, q: str, limit: int = 8):
+    # Typeahead from tracks this container has already seen; no upstream round-trip
+    if not get_client():
+        return []
+    return tracks_response(jio_client.suggest(q, max(1, min(limit, 20))), request, SUGGEST_CACHE)
+
 @app.get("/api/recommendations/{song_id}", response_model=List[SearchResult])
-async def get_recommendations(song_id: str):
-    if not jio_client:
+async def get_recommendations(song_id: str, request: Request):
+    if not get_client():
         return []
     try:
-        results = jio_client.get_recommendations(song_id)
-        serialized_results = []
-        for r in results:
-            serialized_results.append(SearchResult(
-                title=r.get('title', 'Unknown'),
-                artist=r.get('artist', ''),
-                album=r.get('album', ''),
-                thumbnail=r.get('thumbnail', ''),
-                videoId=r.get('id'),
-                streamUrl=r.get('streamUrl')
-            ))
-        return serialized_results
+        results = await jio_client.get_recommendations(song_id)
+        return tracks_response(results, request, RECOMMENDATIONS_CACHE)
     except Exception as e:
         print(f"Rec Error: {e}")
         return []
 
+@app.post("/api/stations/{song_id}")
+async def create_station(song_id: str):
+    if not get_client():
+        raise HTTPException(status_code=503, detail=f"Backend Not Ready: {startup_error}")
+    return {"station_id": stations.create(song_id), "seed": song_id}
+
+@app.get("/api/stations/{station_id}/next", response_model=List[SearchResult])
+async def station_next(station_id: str, n: int = 1):
+    if not get_client():
+        return []
+    # Another instance (or a cold start) won't know the station; the client starts a new one
+    station = stations.get(station_id)
+    if station is None:
+        raise HTTPException(status_code=404, detail="Station not found or expired")
+    try:
+        results = await station.take(max(1, min(n, 20)))
+        return tracks_response(results, cache=QUEUE_CACHE)
+    except Exception as e:
+        print(f"Queue Error: {e}")
+        return []
+
+@app.get("/api/songs", response_model=List[SearchResult])
+async def get_songs(ids: str, quality: Quality = "320", bandwidth: Optional[float] = None):
+    # Batch hydration (e.g. the Library): fresh metadata and stream URLs for many ids at once
+    if not get_client():
+        raise HTTPException(status_code=503, detail=f"Backend Not Ready: {startup_error}")
+    song_ids = [i for i in ids.split(",") if i][:500]
+    try:
+        results = await jio_client.get_songs(song_ids, quality=quality, bandwidth=bandwidth)
+        return tracks_response(results)
+    except Exception as e:
+        print(f"Songs Error: {e}")
+        raise HTTPException(status_code=500, detail="Song lookup failed")
+
+@app.get("/api/resolve")
+async def resolve_streams(ids: str, quality: Quality = "320", bandwidth: Optional[float] = None):
+    # Batched: ?ids=a,b,c -> {"a": url, "b": url, ...}
+    if not get_client():
+        raise HTTPException(status_code=503, detail=f"Backend Not Ready: {startup_error}")
+    song_ids = [i for i in ids.split(",") if i][:100]
+    return await jio_client.resolve_stream_urls(song_ids, quality=quality, bandwidth=bandwidth)
+
+@app.get("/api/resolve/{song_id}")
+async def resolve_stream(song_id: str, token: Optional[str] = None, quality: Quality = "320", bandwidth: Optional[float] = None):
+    if not get_client():
+        raise HTTPException(status_code=503, detail=f"Backend Not Ready: {startup_error}")
+    # The listing's streamToken can be passed back to skip the id lookup
+    stream_url = jio_client.decrypt_url(token) if token else None
+    if stream_url:
+        stream_url = (await jio_client.select_quality({song_id: stream_url}, quality, bandwidth))[song_id]
+    else:
+        stream_url = (await jio_client.resolve_stream_urls([song_id], quality=quality, bandwidth=bandwidth)).get(song_id)
+    if not stream_url:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return {"id": song_id, "streamUrl": stream_url}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    if not get_client():
+        raise HTTPException(status_code=503, detail=f"Backend Not Ready: {startup_error}")
+    return jio_client.stats()
+
+@app.get("/api/metrics")
+async def get_metrics():
+    # Prometheus text format; per-container, since each serverless instance has its own counters
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Simplified Download Job Logic for Vercel (No background tasks persistence guarantee)
 @app.post("/api/download")
 async def start_download(request: DownloadRequest):
@@ -154,6 +343,13 @@ async def start_download(request: DownloadRequest):
     # But for now keep interface.
     return {"job_id": job_id}
 
+@app.get("/api/export")
+@app.post("/api/export")
+async def export_zip():
+    # Mangum buffers the whole response, so a streamed ZIP would blow the function's
+    # memory and response-size limits; exports are only served by server/main.py
+    raise HTTPException(status_code=501, detail="ZIP export needs the streaming server")
+
 @app.get("/api/status/{job_id}")
 async def get_status(job_id: str):
     return {"status": "failed", "error": "Downloads not supported on Serverless Free Tier reliably"}
@@ -162,5 +358,43 @@ async def get_status(job_id: str):
 async def get_file(filename: str):
     raise HTTPException(status_code=404, detail="File storage not available")
 
-# Vercel Handler
-handler = Mangum(app)
+@app.get("/api/stream/{song_id}")
+async def stream_song(song_id: str):
+    # Mangum returns a response in one piece, and a whole track is over the function's
+    # response-size cap; play from the CDN via /api/resolve instead (server/main.py streams)
+    raise HTTPException(status_code=501, detail="Audio streaming needs the streaming server")
+
+@app.get("/api/image")
+async def get_image(src: str, request: Request, size: int = 150):
+    if not get_client():
+        raise HTTPException(status_code=503, detail=f"Backend Not Ready: {startup_error}")
+    try:
+        from images import is_allowed, snap_size
+    except ImportError:
+        from api.images import is_allowed, snap_size
+    if not is_allowed(src):
+        raise HTTPException(status_code=400, detail="Unsupported image source")
+    webp = "image/webp" in request.headers.get("accept", "")
+    try:
+        path, etag, media_type = await image_cache.get(src, snap_size(size), webp=webp)
+    except Exception as e:
+        print(f"Image Error: {e}")
+        raise HTTPException(status_code=502, detail="Image fetch failed")
+    # Variants of a URL never change, so the edge cache and browsers may keep them for good
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable", "Vary": "Accept"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+# Vercel Handler (Mangum is only imported on the first invocation)
+_mangum = None
+
+def handler(event, context):
+    global _mangum
+    if _mangum is None:
+        with startup.imported("mangum"):
+            from mangum import Mangum
+        _mangum = Mangum(app)
+    return _mangum(event, context)
+
+startup.mark_ready()
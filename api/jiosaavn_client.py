@@ -1,149 +1,690 @@
-import requests
-import json
+import os
+import re
+import httpx
 import base64
+import asyncio
+from functools import lru_cache
 
-class JioSaavnClient:
-    def __init__(self):
-        self.base_url = "https://www.jiosaavn.com/api.php"
-        # Standard generic headers to mimic a browser/client
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.72 Safari/537.36",
-            "Accept": "application/json, text/plain, */*"
-        }
-        self.des_key = b"38346591"
+from cache import TTLCache
+from singleflight import SingleFlight
+from serialization import TrackList
+from persistent_cache import SQLiteCache
+from metrics import metrics
+from suggest import SuggestIndex
+from tracks import TrackStore
+from upstream_guard import UpstreamGuard, AdaptiveLimiter, CircuitBreaker
+
+BASE_URL = "https://www.jiosaavn.com/api.php"
+
+# Standard generic headers to mimic a browser/client
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.72 Safari/537.36",
+    "Accept": "application/json, text/plain, */*"
+}
+
+DES_KEY = b"38346591"
+
+# Default per-call timeouts (seconds), capped by the client-wide timeout. Listings are
+# worth waiting a little for; radio has the artist mix as a hedge anyway.
+CALL_TIMEOUTS = {
+    "search.getResults": 6.0,
+    "song.getDetails": 5.0,
+    "webradio.getSong": 4.0,
+}
+
+# Bitrates (kbps) every track is encoded at; the media URL names one ("..._160.mp4")
+QUALITIES = ("96", "160", "320")
+
+_QUALITY_IN_URL = re.compile(r"_(96|160|320)(?=\.(?:mp4|m4a)\b)")
+
+# Map categories to JioSaavn search terms
+CAT_MAP = {
+    "all": "Trending India",
+    "phonk": "Best Phonk Music",
+    "bollywood": "Bollywood Top 50",
+    "old": "Old Hindi Songs Retro",
+    "hollywood": "English Top 50 Global",
+    "japanese": "Japanese Pop Anime",
+    "lofi": "Lofi Beats",
+    "punjabi": "Punjabi Top 50"
+}
+
+
+_des_cipher = None
+
+
+def _get_cipher():
+    # ECB carries no state between blocks, so one cipher object can be reused for every URL
+    global _des_cipher
+    if _des_cipher is None:
+        # Imported lazily so a missing pycryptodome only breaks playback, not startup
+        from Crypto.Cipher import DES
+        _des_cipher = DES.new(DES_KEY, DES.MODE_ECB)
+    return _des_cipher
+
+
+@lru_cache(maxsize=4096)
+def _decrypt_cached(encrypted_url):
+    # Add padding if necessary for base64 decode (standard base64 usually)
+    encrypted_data = base64.b64decode(encrypted_url)
+    decrypted_data = _get_cipher().decrypt(encrypted_data)
+    # Proper PKCS7 unpadding
+    pad_len = decrypted_data[-1]
+    if isinstance(pad_len, str):
+        pad_len = ord(pad_len) # Handle if python version differences returns char
+
+    return decrypted_data[:-pad_len].decode('utf-8')
+
+
+def decrypt_url(encrypted_url, quality="320"):
+    # Memoized on the encrypted blob; failures are not cached
+    try:
+        with metrics.timer("jiosaavn_decrypt_seconds", timing="decrypt"):
+            return with_quality(_decrypt_cached(encrypted_url), quality)
+    except Exception as e:
+        print(f"Decryption Error: {e}")
+        return None
+
+
+def with_quality(url, quality):
+    """`url` pointed at the `quality` kbps rendition ("..._160.mp4" -> "..._320.mp4"); not checked to exist."""
+    return _QUALITY_IN_URL.sub(f"_{quality}", url) if url else url
+
+
+def url_quality(url):
+    match = _QUALITY_IN_URL.search(url or "")
+    return match.group(1) if match else None
+
+
+def quality_for_bandwidth(kbps):
+    # Highest bitrate that fits in half the reported bandwidth, so playback stays ahead of the buffer
+    if not kbps:
+        return QUALITIES[-1]
+    fitting = [q for q in QUALITIES if int(q) * 2 <= kbps]
+    return fitting[-1] if fitting else QUALITIES[0]
+
+
+# --- Request builders / response parsers (shared by the sync and async clients) ---
+
+def search_params(query, page=1, size=20):
+    return {
+        "__call": "search.getResults",
+        "_format": "json",
+        "_marker": "0",
+        "p": str(page),
+        "n": str(size),
+        "q": query
+    }
 
-    def decrypt_url(self, encrypted_url):
-        try:
-            from Crypto.Cipher import DES
-            cipher = DES.new(self.des_key, DES.MODE_ECB)
-            # Add padding if necessary for base64 decode (standard base64 usually)
-            encrypted_data = base64.b64decode(encrypted_url)
-            decrypted_data = cipher.decrypt(encrypted_data)
-            # Proper PKCS7 unpadding
-            pad_len = decrypted_data[-1]
-            if isinstance(pad_len, str):
-                pad_len = ord(pad_len) # Handle if python version differences returns char
-            
-            url = decrypted_data[:-pad_len].decode('utf-8')
-            
-            # Upgrade quality logic
-            url = url.replace("_96.mp4", "_320.mp4")
-            url = url.replace("_160.mp4", "_320.mp4")
-            url = url.replace("_96.m4a", "_320.m4a")
-            url = url.replace("_160.m4a", "_320.m4a")
-            
-            return url
-        except Exception as e:
-            # print(f"Decryption Error: {e}")
-            return None
 
-    def search_songs(self, query):
-        params = {
-            "__call": "search.getResults",
-            "_format": "json",
-            "_marker": "0",
-            "p": "1",
-            "n": "20",
-            "q": query
+def song_params(song_id):
+    return {
+        "__call": "song.getDetails",
+        "_format": "json",
+        "pids": song_id
+    }
+
+
+def radio_params(song_id):
+    # "Spotify-like" Algorithm: Station API
+    # Create a station from the song_id and fetch next song
+    return {
+        "__call": "webradio.getSong",
+        "stationid": f'{{"pid":"{song_id}","mode":"song"}}', # Station ID format for song radio
+        "k": "20",
+        "next": "1", # Getting next songs
+        "_format": "json"
+    }
+
+
+def normalize_song(item):
+    # Normalize to our app's structure
+    # SongCard expects: title, artist, album, thumbnail, videoId (we will use 'id' here)
+    song_id = item.get("id")
+    enc_url = item.get("encrypted_media_url")
+    return {
+        "id": song_id,
+        "title": item.get("song"),
+        "artist": item.get("singers"), # or primary_artists
+        "album": item.get("album"),
+        "thumbnail": item.get("image", "").replace("150x150", "500x500"),
+        # Most listed tracks are never played, so the stream URL is only decrypted
+        # on demand via /api/resolve. The token is the encrypted blob itself.
+        "streamUrl": None,
+        "streamToken": enc_url,
+        # We keep 'videoId' for compatibility for now, but fill it with ID
+        "videoId": song_id
+    }
+
+
+def cache_key(query, page=1, size=20):
+    # Normalize so "Lofi  Beats" and "lofi beats" share one entry
+    return (" ".join(query.lower().split()), int(page), int(size))
+
+
+def encode_cursor(page, size):
+    # Opaque to clients; only valid together with the query it was issued for
+    return base64.urlsafe_b64encode(f"{int(page)}:{int(size)}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(page, size) from a cursor issued by encode_cursor; ValueError if it is malformed."""
+    try:
+        page, size = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        page, size = int(page), int(size)
+    except Exception:
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    if page < 1 or not 1 <= size <= 50:
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return page, size
+
+
+def parse_song_items(data):
+    # song.getDetails returns dict where key is ID, OR 'songs' list
+    if isinstance(data.get("songs"), list):
+        return [item for item in data["songs"] if isinstance(item, dict)]
+    return [item for item in data.values() if isinstance(item, dict) and 'id' in item]
+
+
+def parse_search(data):
+    return TrackList(normalize_song(item) for item in data.get("results", []))
+
+
+def parse_song(data, song_id):
+    # song.getDetails returns dict where key is ID, OR 'songs' list
+    # usually: { "id": { ... } } or { "songs": [ ... ] }
+    if song_id in data:
+        item = data[song_id]
+        return {
+            "id": item.get("id"),
+            "title": item.get("song"),
+            "artist": item.get("singers") or item.get("primary_artists"),
+            "thumbnail": item.get("image", "")
         }
+    # Fallback if structure differs
+    return None
+
+
+def parse_radio(data):
+    # The structure for radio response varies.
+    # Often response is a dict where keys are the items. Complex to parse blindly.
+    serialized = TrackList()
+    if isinstance(data, dict) and 'error' not in data:
+        for k, item in data.items():
+            if isinstance(item, dict) and 'id' in item:
+                serialized.append(normalize_song(item))
+    return serialized
+
+
+class JioSaavnClient:
+    """Blocking client, kept for scripts and sync callers. The API routes use AsyncJioSaavnClient."""
+
+    def __init__(self, base_url=BASE_URL, timeout=10.0):
+        self.base_url = base_url
+        self.headers = dict(DEFAULT_HEADERS)
+        self.des_key = DES_KEY
+        self.timeout = timeout
+        # Imported here so the async API entry points don't pay for it at cold start
+        import requests
+        # Reuse connections across calls instead of a new TCP+TLS handshake each time
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+
+    def decrypt_url(self, encrypted_url, quality="320"):
+        return decrypt_url(encrypted_url, quality)
+
+    def _get_json(self, params):
+        resp = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        return resp.json()
+
+    def search_songs(self, query, page=1, size=20):
         try:
-            resp = requests.get(self.base_url, params=params, headers=self.headers)
-            data = resp.json()
-            results = data.get("results", [])
-            
-            serialized = []
-            for item in results:
-                song_id = item.get("id")
-                enc_url = item.get("encrypted_media_url")
-                
-                stream_url = self.decrypt_url(enc_url) if enc_url else None
-                image = item.get("image", "").replace("150x150", "500x500")
-                
-                serialized.append({
-                     "id": song_id,
-                     "title": item.get("song"),
-                     "artist": item.get("singers"), 
-                     "album": item.get("album"),
-                     "thumbnail": image,
-                     "streamUrl": stream_url,
-                     "videoId": song_id 
-                })
-            return serialized
+            return parse_search(self._get_json(search_params(query, page, size)))
         except Exception as e:
             print(f"Search Error: {e}")
             return []
 
     def get_charts(self, category="all"):
-        cat_map = {
-            "all": "Trending India",
-            "phonk": "Best Phonk Music",
-            "bollywood": "Bollywood Top 50",
-            "old": "Old Hindi Songs Retro",
-            "hollywood": "English Top 50 Global",
-            "japanese": "Japanese Pop Anime",
-            "lofi": "Lofi Beats",
-            "punjabi": "Punjabi Top 50"
-        }
-        
-        search_query = cat_map.get(category.lower(), category)
+        search_query = CAT_MAP.get(category.lower(), category)
         print(f"Fetching charts for category: {category} -> Query: {search_query}")
+
         return self.search_songs(search_query)
 
     def get_song(self, song_id):
-        params = {
-            "__call": "song.getDetails",
-            "_format": "json",
-            "pids": song_id
-        }
+        # Used if we only have ID and need details
         try:
-            resp = requests.get(self.base_url, params=params, headers=self.headers)
-            data = resp.json()
-            if song_id in data:
-                item = data[song_id]
-                return {
-                    "id": item.get("id"),
-                    "title": item.get("song"),
-                    "artist": item.get("singers") or item.get("primary_artists"),
-                    "thumbnail": item.get("image", "")
-                }
-            return None
+            return parse_song(self._get_json(song_params(song_id)), song_id)
         except:
             return None
 
     def get_recommendations(self, song_id):
-        params = {
-            "__call": "webradio.getSong",
-            "stationid": f'{{"pid":"{song_id}","mode":"song"}}', 
-            "k": "20",
-            "next": "1", 
-            "_format": "json"
-        }
         try:
-            resp = requests.get(self.base_url, params=params, headers=self.headers)
-            data = resp.json()
-            serialized = []
-            
-            if isinstance(data, dict) and 'error' not in data:
-                 for k, item in data.items():
-                    if isinstance(item, dict) and 'id' in item:
-                         enc_url = item.get("encrypted_media_url")
-                         stream_url = self.decrypt_url(enc_url) if enc_url else None
-                         serialized.append({
-                            "id": item.get("id"),
-                            "title": item.get("song"),
-                            "artist": item.get("singers"), 
-                            "album": item.get("album"),
-                            "thumbnail": item.get("image", "").replace("150x150", "500x500"),
-                            "streamUrl": stream_url,
-                            "videoId": item.get("id") 
-                        })
-            
+            serialized = parse_radio(self._get_json(radio_params(song_id)))
             if serialized: return serialized
-            
+
+            # Fallback 1: Search for the Artist to keep the "Category/Vibe" same
+            # This ensures if you play Arijit, you get Arijit next.
             song_full = self.get_song(song_id)
-            if song_full and 'artist' in song_full:
+            if song_full and song_full.get('artist'):
+                print(f"Radio failed, falling back to Artist Mix: {song_full['artist']}")
                 return self.search_songs(f"{song_full['artist']} best songs")
-            
+
+            # Fallback 2: Generic Viral
             return self.search_songs("Viral Hits")
+
         except Exception as e:
+            print(f"Rec Error: {e}")
             return self.search_songs("Recommended")
+
+
+class AsyncJioSaavnClient:
+    """
+    Non-blocking JioSaavn client for the FastAPI routes.
+
+    All calls share one pooled keep-alive httpx session, so a single worker can keep
+    hundreds of upstream requests in flight without blocking the event loop.
+    Search and chart results go through a TTL/LRU cache with stale-while-revalidate,
+    and identical upstream calls that overlap in time are coalesced into one request.
+    An optional SQLite tier (`persistent`) keeps upstream responses and resolved stream
+    URLs across restarts and shares them between workers on the same host.
+    Call `aclose()` on shutdown to release the pool.
+    """
+
+    def __init__(self, base_url=BASE_URL, max_connections=200, max_keepalive_connections=50, timeout=10.0, connect_timeout=3.0,
+                 cache_size=512, search_ttl=300.0, chart_ttl=900.0, stale_ttl=3600.0, rec_budget=2.5, rec_hedge=1.0,
+                 persistent=None, details_ttl=21600.0, stream_url_ttl=86400.0, suggest_size=50000, track_store_size=50000,
+                 guard=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.search_ttl = search_ttl
+        self.chart_ttl = chart_ttl
+        self.rec_budget = rec_budget
+        self.rec_hedge = rec_hedge
+        self.persistent = persistent
+        self.details_ttl = details_ttl
+        self.stream_url_ttl = stream_url_ttl
+        self.cache = TTLCache(max_size=cache_size, ttl=search_ttl, stale_ttl=stale_ttl)
+        self.flight = SingleFlight()
+        # Adaptive concurrency limit + circuit breaker in front of every upstream call
+        self.guard = guard or UpstreamGuard(AdaptiveLimiter(max_limit=max_connections))
+        # Compact record of every track we have listed, so resolve and song details need no upstream call
+        self.tracks = TrackStore(max_tracks=track_store_size)
+        # Typeahead over every track we have listed, answered without an upstream call
+        self.suggestions = SuggestIndex(max_tracks=suggest_size)
+        # (categories, size) -> (source chart pages, deduplicated shelves) for get_chart_shelves
+        self._shelves = TTLCache(max_size=64, ttl=chart_ttl, stale_ttl=0)
+        # (song id, quality) -> whether the CDN has that rendition, so "auto" probes each track once
+        self.variants = TTLCache(max_size=track_store_size, ttl=stream_url_ttl, stale_ttl=0)
+        self._probes = asyncio.Semaphore(16)
+        self.http = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        )
+
+    @classmethod
+    def from_env(cls, persistent_path=None):
+        # Pool size and timeouts are tunable per deployment without code changes
+        return cls(
+            base_url=os.getenv("JIOSAAVN_BASE_URL", BASE_URL),
+            max_connections=int(os.getenv("JIOSAAVN_MAX_CONNECTIONS", "200")),
+            max_keepalive_connections=int(os.getenv("JIOSAAVN_MAX_KEEPALIVE", "50")),
+            timeout=float(os.getenv("JIOSAAVN_TIMEOUT", "10")),
+            cache_size=int(os.getenv("JIOSAAVN_CACHE_SIZE", "512")),
+            search_ttl=float(os.getenv("JIOSAAVN_SEARCH_TTL", "300")),
+            chart_ttl=float(os.getenv("JIOSAAVN_CHART_TTL", "900")),
+            stale_ttl=float(os.getenv("JIOSAAVN_STALE_TTL", "3600")),
+            rec_budget=float(os.getenv("JIOSAAVN_REC_BUDGET", "2.5")),
+            rec_hedge=float(os.getenv("JIOSAAVN_REC_HEDGE", "1.0")),
+            persistent=SQLiteCache.from_env(persistent_path),
+            suggest_size=int(os.getenv("JIOSAAVN_SUGGEST_SIZE", "50000")),
+            track_store_size=int(os.getenv("JIOSAAVN_TRACK_STORE_SIZE", "50000")),
+            guard=UpstreamGuard(
+                AdaptiveLimiter(
+                    initial=int(os.getenv("JIOSAAVN_INITIAL_CONCURRENCY", "16")),
+                    max_limit=int(os.getenv("JIOSAAVN_MAX_CONNECTIONS", "200")),
+                    latency_target=float(os.getenv("JIOSAAVN_LATENCY_TARGET", "2")),
+                ),
+                CircuitBreaker(
+                    failure_threshold=int(os.getenv("JIOSAAVN_BREAKER_THRESHOLD", "5")),
+                    reset_timeout=float(os.getenv("JIOSAAVN_BREAKER_RESET", "30")),
+                ),
+            ),
+        )
+
+    async def aclose(self):
+        await self.http.aclose()
+        if self.persistent:
+            self.persistent.close()
+
+    def decrypt_url(self, encrypted_url, quality="320"):
+        return decrypt_url(encrypted_url, quality)
+
+    def stats(self):
+        return {
+            "cache": self.cache.stats(),
+            "singleflight": self.flight.stats(),
+            "upstream": self.guard.stats(),
+            "persistent": self.persistent.stats() if self.persistent else None,
+            "tracks": self.tracks.stats(),
+            "suggest": self.suggestions.stats(),
+            "variants": self.variants.stats(),
+        }
+
+    async def _get_json(self, params, timeout=None, persist_ttl=None, refresh=False):
+        # Concurrent callers with the same (__call, params) share one upstream request.
+        # `refresh` skips the SQLite read (but still writes), for callers that want new data.
+        key = (params.get("__call"), tuple(sorted(params.items())))
+        if not (persist_ttl and self.persistent):
+            return await self.flight.do(key, lambda: self._fetch_json(params, timeout))
+
+        async def load():
+            persist_key = "api:" + "&".join(f"{k}={v}" for k, v in key[1])
+            data = None if refresh else await self.persistent.get(persist_key)
+            if data is None:
+                data = await self._fetch_json(params, timeout)
+                if data:
+                    await self.persistent.set(persist_key, data, persist_ttl)
+            return data
+
+        return await self.flight.do(key, load)
+
+    async def _fetch_json(self, params, timeout=None):
+        call = params.get("__call", "")
+        # `timeout` overrides the per-call default for this call only
+        if timeout is None:
+            timeout = min(self.timeout, CALL_TIMEOUTS.get(call, self.timeout))
+        try:
+            # Fails fast with UpstreamUnavailable while the circuit is open
+            async with self.guard.slot():
+                with metrics.timer("jiosaavn_upstream_seconds", timing="upstream", call=call):
+                    resp = await self.http.get(self.base_url, params=params, timeout=timeout)
+                    resp.raise_for_status()
+                    return resp.json()
+        except Exception:
+            metrics.inc("jiosaavn_upstream_errors_total", call=call)
+            raise
+
+    def _remember(self, tracks):
+        # Every normalized track goes into the shared store and the typeahead index
+        for song in tracks:
+            track = self.tracks.put(song)
+            if track is not None:
+                self.suggestions.add(track)
+        return tracks
+
+    async def _fetch_song_items(self, song_ids, chunk_size=50, timeout=None):
+        # song.getDetails accepts comma-separated pids; chunks are fetched concurrently
+        chunks = [song_ids[i:i + chunk_size] for i in range(0, len(song_ids), chunk_size)]
+        results = await asyncio.gather(
+            *(self._get_json(song_params(",".join(chunk)), timeout) for chunk in chunks),
+            return_exceptions=True,
+        )
+        items = {}
+        for data in results:
+            if isinstance(data, Exception):
+                print(f"Song Details Error: {data}")
+                continue
+            for item in parse_song_items(data):
+                items[item["id"]] = item
+        return items
+
+    async def get_songs(self, song_ids, chunk_size=50, timeout=None, quality="320", bandwidth=None):
+        """Fresh details and stream URLs for many pids in len(song_ids) / chunk_size upstream calls."""
+        items = await self._fetch_song_items(list(dict.fromkeys(song_ids)), chunk_size, timeout)
+        songs = self._remember(TrackList(normalize_song(items[i]) for i in song_ids if i in items))
+        urls = {song["id"]: decrypt_url(song["streamToken"]) if song["streamToken"] else None for song in songs}
+        urls = await self.select_quality(urls, quality, bandwidth)
+        for song in songs:
+            song["streamUrl"] = urls.get(song["id"])
+        return songs
+
+    async def resolve_stream_urls(self, song_ids, timeout=None, quality="320", bandwidth=None):
+        """Decrypt stream URLs for `song_ids`, fetching tokens we haven't seen from song details."""
+        tokens = {}
+        missing = []
+        for song_id in song_ids:
+            track = self.tracks.get(song_id)
+            if track is not None and track.token:
+                tokens[song_id] = track.token
+            else:
+                missing.append(song_id)
+
+        urls = {song_id: decrypt_url(token) for song_id, token in tokens.items()}
+
+        if missing and self.persistent:
+            stored = await self.persistent.get_many([f"stream:{i}" for i in missing])
+            for song_id in missing:
+                if stored.get(f"stream:{song_id}"):
+                    urls[song_id] = stored[f"stream:{song_id}"]
+            missing = [i for i in missing if i not in urls]
+
+        if missing:
+            fetched = {}
+            for song_id, item in (await self._fetch_song_items(missing, timeout=timeout)).items():
+                if item.get("encrypted_media_url"):
+                    self._remember([normalize_song(item)])
+                    urls[song_id] = fetched[f"stream:{song_id}"] = decrypt_url(item["encrypted_media_url"])
+            if self.persistent:
+                await self.persistent.set_many({k: v for k, v in fetched.items() if v}, self.stream_url_ttl)
+
+        return await self.select_quality({song_id: urls.get(song_id) for song_id in song_ids}, quality, bandwidth)
+
+    async def select_quality(self, urls, quality="320", bandwidth=None):
+        """
+        {song_id: url} pointed at `quality` ("96", "160", "320" or "auto").
+
+        "auto" starts from the bitrate `bandwidth` (kbps, as reported by the client)
+        can sustain and checks with the CDN that the track has it, stepping down (then
+        up) to the nearest rendition that exists. Fixed qualities are not checked.
+        """
+        if quality != "auto":
+            return {song_id: with_quality(url, quality) for song_id, url in urls.items()}
+        preferred = quality_for_bandwidth(bandwidth)
+        picked = await asyncio.gather(*(self._pick_variant(song_id, url, preferred) for song_id, url in urls.items()))
+        return dict(zip(urls, picked))
+
+    async def _pick_variant(self, song_id, url, preferred):
+        if not url:
+            return url
+        rank = QUALITIES.index(preferred)
+        for quality in QUALITIES[rank::-1] + QUALITIES[rank + 1:]:
+            exists = await self._variant_exists(song_id, url, quality)
+            if exists is None:
+                # Can't tell right now; let the player try the preferred one
+                break
+            if exists:
+                return with_quality(url, quality)
+        return with_quality(url, preferred)
+
+    async def _variant_exists(self, song_id, url, quality):
+        # True/False, remembered per track; None (not remembered) if the CDN couldn't be asked
+        known, _ = self.variants.get((song_id, quality))
+        if known is not None:
+            return known
+
+        async def probe():
+            async with self._probes:
+                resp = await self.http.head(with_quality(url, quality), timeout=3.0, follow_redirects=True)
+            exists = resp.status_code < 400
+            self.variants.set((song_id, quality), exists)
+            return exists
+
+        try:
+            return await self.flight.do(("probe", song_id, quality), probe)
+        except httpx.HTTPError as e:
+            print(f"Variant Probe Error: {e}")
+            return None
+
+    def stream_quality(self, url):
+        """Bitrate named in a stream URL ("320"), e.g. to key the audio cache."""
+        return url_quality(url)
+
+    def _search_loader(self, query, page, size, ttl, timeout=None):
+        async def load():
+            data = await self._get_json(search_params(query, page, size), timeout, persist_ttl=ttl)
+            return self._remember(parse_search(data))
+        return load
+
+    def _prefetch_next(self, query, page, size, ttl):
+        # Page N+1 is usually requested right after page N, so start loading it now
+        if not self.guard.healthy:
+            return
+        self.cache.prefetch(cache_key(query, page + 1, size), self._search_loader(query, page + 1, size, ttl), ttl)
+
+    async def _cached_search(self, query, page, size, ttl, timeout, prefetch=False):
+        key = cache_key(query, page, size)
+        try:
+            tracks = await self.cache.get_or_load(key, self._search_loader(query, page, size, ttl, timeout), ttl)
+        except Exception as e:
+            print(f"Search Error: {e}")
+            # Upstream is down: an expired listing beats an empty page
+            return self.cache.last_known(key) or []
+        if prefetch and len(tracks) >= size:
+            self._prefetch_next(query, page, size, ttl)
+        return tracks
+
+    async def _stream_search(self, query, page, size, ttl, timeout, prefetch=False):
+        # Same cache entries as _cached_search, but tracks are yielded one by one as they are normalized
+        key = cache_key(query, page, size)
+        cached, state = self.cache.get(key)
+        if state == "stale":
+            self.cache.prefetch(key, self._search_loader(query, page, size, ttl), ttl)
+        if cached is None and not self.guard.healthy:
+            # Upstream is down: an expired listing beats an error
+            cached = self.cache.last_known(key)
+        if cached is not None:
+            tracks = cached
+            for track in cached:
+                yield track
+        else:
+            data = await self._get_json(search_params(query, page, size), timeout, persist_ttl=ttl)
+            tracks = TrackList()
+            for item in data.get("results", []):
+                track = normalize_song(item)
+                tracks.append(track)
+                yield track
+            self._remember(tracks)
+            if tracks:
+                self.cache.set(key, tracks, ttl)
+        if prefetch and len(tracks) >= size:
+            self._prefetch_next(query, page, size, ttl)
+
+    def suggest(self, query, limit=10):
+        """Typeahead matches from tracks seen so far; never goes upstream."""
+        return self.suggestions.search(query, limit)
+
+    async def search_songs(self, query, page=1, size=20, timeout=None, prefetch=False):
+        return await self._cached_search(query, page, size, self.search_ttl, timeout, prefetch)
+
+    def stream_search(self, query, page=1, size=20, timeout=None, prefetch=False):
+        """Async iterator over one page of search results; upstream errors are raised."""
+        return self._stream_search(query, page, size, self.search_ttl, timeout, prefetch)
+
+    async def get_charts(self, category="all", page=1, size=20, timeout=None, prefetch=False):
+        search_query = CAT_MAP.get(category.lower(), category)
+
+        return await self._cached_search(search_query, page, size, self.chart_ttl, timeout, prefetch)
+
+    def stream_charts(self, category="all", page=1, size=20, timeout=None, prefetch=False):
+        search_query = CAT_MAP.get(category.lower(), category)
+        return self._stream_search(search_query, page, size, self.chart_ttl, timeout, prefetch)
+
+    async def get_chart_shelves(self, categories=None, size=20, timeout=None):
+        """
+        [(category, tracks)] for the first page of several charts (all of them by
+        default), fetched concurrently. A track already on an earlier shelf is left
+        out of later ones, so shelves can come back shorter than `size`.
+        """
+        categories = list(dict.fromkeys(c.lower() for c in categories or CAT_MAP))
+        pages = await asyncio.gather(*(self.get_charts(c, 1, size, timeout) for c in categories))
+
+        # Same cached pages as last time -> same shelves, so their encoded bodies are reused
+        key = (tuple(categories), size)
+        known, _ = self._shelves.get(key)
+        if known is not None and all(a is b for a, b in zip(known[0], pages)):
+            return known[1]
+
+        seen = set()
+        shelves = []
+        for category, tracks in zip(categories, pages):
+            shelf = TrackList(t for t in tracks if t["id"] not in seen)
+            if len(shelf) == len(tracks):
+                shelf = tracks # Nothing dropped: keep the cached page and its encoded body
+            seen.update(t["id"] for t in shelf)
+            shelves.append((category, shelf))
+        if all(pages):
+            self._shelves.set(key, (pages, shelves))
+        return shelves
+
+    async def refresh_chart(self, category="all", page=1, size=20, timeout=None):
+        """Re-fetch one chart page into the cache even if it is still fresh; upstream errors are raised."""
+        search_query = CAT_MAP.get(category.lower(), category)
+        data = await self._get_json(search_params(search_query, page, size), timeout, persist_ttl=self.chart_ttl, refresh=True)
+        tracks = self._remember(parse_search(data))
+        if tracks:
+            self.cache.set(cache_key(search_query, page, size), tracks, self.chart_ttl)
+        return tracks
+
+    async def get_song(self, song_id, timeout=None):
+        # Used if we only have ID and need details; anything listed recently is already in the store
+        track = self.tracks.get(song_id)
+        if track is not None:
+            return {"id": track.id, "title": track.title, "artist": track.artist, "thumbnail": track.thumbnail}
+        try:
+            data = await self._get_json(song_params(song_id), timeout, persist_ttl=self.details_ttl)
+            self._remember([normalize_song(item) for item in parse_song_items(data)])
+            return parse_song(data, song_id)
+        except Exception:
+            return None
+
+    async def get_recommendations(self, song_id, budget=None, timeout=None):
+        """
+        Radio is the primary algorithm and gets the whole `budget` (seconds). The
+        artist-mix lookup is a hedge: it is only started if radio fails, comes back
+        empty or is still running after `rec_hedge` seconds, and only used if radio
+        hasn't answered by the deadline. When radio is quick, it is the only upstream call.
+        """
+        budget = self.rec_budget if budget is None else budget
+        if not self.guard.healthy:
+            # Don't add radio + artist-mix calls to a struggling upstream; the fallback is usually cached
+            return await self.search_songs("Viral Hits", timeout=timeout)
+
+        async def radio():
+            return self._remember(parse_radio(await self._get_json(radio_params(song_id), timeout)))
+
+        async def artist_mix():
+            # Search for the Artist to keep the "Category/Vibe" same
+            song = await self.get_song(song_id, timeout)
+            if song and song.get('artist'):
+                return await self.search_songs(f"{song['artist']} best songs", timeout=timeout)
+            return []
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+        radio_task = asyncio.create_task(radio())
+        tasks = [radio_task]
+        try:
+            await asyncio.wait({radio_task}, timeout=min(self.rec_hedge, budget))
+            if radio_task.done() and radio_task.exception() is None and radio_task.result():
+                return radio_task.result()
+            # Radio failed, was empty or is slow: hedge with the artist mix, radio still first
+            tasks.append(asyncio.create_task(artist_mix()))
+            for task in tasks:
+                await asyncio.wait({task}, timeout=max(0.0, deadline - loop.time()))
+                if not task.done():
+                    continue
+                if task.exception() is not None:
+                    print(f"Rec Error: {task.exception()}")
+                elif task.result():
+                    return task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # Fallback: Generic Viral (usually served from cache)
+        print(f"Radio and Artist Mix missed for {song_id}, falling back to Viral Hits")
+        return await self.search_songs("Viral Hits", timeout=timeout)
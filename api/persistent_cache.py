@@ -0,0 +1,141 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from serialization import dumps, loads
+
+
+class SQLiteCache:
+    """
+    Optional persistent cache tier behind the in-memory TTLCache.
+
+    Survives process restarts (warm serverless containers, uvicorn reloads) and,
+    thanks to WAL mode, can be shared by several worker processes on one host.
+    Values are JSON-encoded; every entry has its own expiry. The file is kept under
+    `max_bytes` by dropping expired and then least recently read rows, followed by
+    an incremental vacuum.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 ** 2, compact_every=200):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compact_every = compact_every
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        # auto_vacuum only takes effect before the first table is created
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    @classmethod
+    def from_env(cls, default_path=None):
+        # JIOSAAVN_SQLITE_PATH="" disables the tier
+        path = os.getenv("JIOSAAVN_SQLITE_PATH", default_path or "")
+        if not path:
+            return None
+        try:
+            return cls(path, max_bytes=int(os.getenv("JIOSAAVN_SQLITE_MAX_BYTES", str(64 * 1024 ** 2))))
+        except Exception as e:
+            # A broken or read-only cache file must never take the API down
+            print(f"Persistent Cache Error: {e}")
+            return None
+
+    # --- Blocking primitives (run in a worker thread) ---
+
+    def _get_many(self, keys):
+        if not keys:
+            return {}
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value, accessed_at FROM entries WHERE expires_at > ? AND key IN ({','.join('?' * len(keys))})",
+                (now, *keys),
+            ).fetchall()
+            # Refreshing the access time is a write, so only do it once a minute per row
+            stale = [key for key, _, accessed_at in rows if now - accessed_at > 60]
+            if stale:
+                self._conn.executemany("UPDATE entries SET accessed_at = ? WHERE key = ?", [(now, k) for k in stale])
+        return {key: value for key, value, _ in rows}
+
+    def _set_many(self, items, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(key, value, now + ttl, now) for key, value in items],
+            )
+            self.writes += len(items)
+            due = self.writes % self.compact_every < len(items)
+        if due:
+            self.compact()
+
+    def size_bytes(self):
+        with self._lock:
+            pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            free = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return (pages - free) * page_size
+
+    def compact(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        # Evict least recently read rows in 10% steps until we fit the budget
+        while self.size_bytes() > self.max_bytes:
+            with self._lock:
+                count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                if not count:
+                    break
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                    (max(1, count // 10),),
+                )
+        with self._lock:
+            self._conn.execute("PRAGMA incremental_vacuum")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # --- Async API used by the client ---
+
+    async def get(self, key):
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys):
+        try:
+            raw = await asyncio.to_thread(self._get_many, list(keys))
+        except sqlite3.Error as e:
+            print(f"Persistent Cache Error: {e}")
+            return {}
+        self.hits += len(raw)
+        self.misses += len(keys) - len(raw)
+        return {key: loads(value) for key, value in raw.items()}
+
+    async def set(self, key, value, ttl):
+        await self.set_many({key: value}, ttl)
+
+    async def set_many(self, items, ttl):
+        if not items:
+            return
+        try:
+            await asyncio.to_thread(self._set_many, [(k, dumps(v)) for k, v in items.items()], ttl)
+        except sqlite3.Error as e:
+            print(f"Persistent Cache Error: {e}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self):
+        return {"path": self.path, "hits": self.hits, "misses": self.misses, "writes": self.writes, "max_bytes": self.max_bytes}
@@ -0,0 +1,155 @@
+import hashlib
+import json
+
+from fastapi.responses import Response
+
+from metrics import metrics
+from images import artwork
+
+try:
+    import orjson
+except ImportError: # Optional: falls back to the stdlib encoder
+    orjson = None
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def track_payload(r):
+    # Same shape as the SearchResult model the frontend expects
+    return {
+        "title": r.get('title') or 'Unknown',
+        "artist": r.get('artist') or '',
+        "album": r.get('album') or '',
+        "thumbnail": r.get('thumbnail') or '',
+        "artwork": artwork(r.get('thumbnail')), # Right-sized proxy URLs per UI slot
+        "videoId": r.get('id'), # Compat
+        "streamUrl": r.get('streamUrl'),
+        "streamToken": r.get('streamToken'),
+    }
+
+
+class TrackList(list):
+    """
+    List of normalized tracks that remembers its encoded JSON body and ETag.
+
+    Cached results are the same TrackList object on every hit, so the body is
+    built (and hashed) once per cache fill instead of once per request.
+    """
+
+    __slots__ = ("_body", "_etag")
+
+    def json_body(self):
+        body = getattr(self, "_body", None)
+        if body is None:
+            with metrics.timer("serialize_seconds", timing="serialize"):
+                body = self._body = dumps([track_payload(r) for r in self])
+        return body
+
+    def etag(self):
+        etag = getattr(self, "_etag", None)
+        if etag is None:
+            etag = self._etag = content_etag(self.json_body())
+        return etag
+
+
+def content_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match may list several tags, possibly weak ("W/..."), or be "*"
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def cache_control(max_age, s_maxage=None, stale_while_revalidate=None, private=False):
+    """
+    Cache-Control value for a listing. Browsers keep it for `max_age` seconds and
+    then revalidate (a cheap 304); shared caches such as the Vercel edge may keep it
+    for `s_maxage` and serve it stale while refetching in the background.
+    """
+    if private:
+        return f"private, max-age={int(max_age)}"
+    parts = [f"public, max-age={int(max_age)}"]
+    if s_maxage is not None:
+        parts.append(f"s-maxage={int(s_maxage)}")
+    if stale_while_revalidate:
+        parts.append(f"stale-while-revalidate={int(stale_while_revalidate)}")
+    return ", ".join(parts)
+
+
+def encode_tracks(tracks):
+    if isinstance(tracks, TrackList):
+        return tracks.json_body()
+    with metrics.timer("serialize_seconds", timing="serialize"):
+        return dumps([track_payload(r) for r in tracks])
+
+
+def tracks_response(tracks, request=None, cache=None):
+    """
+    Ready-made JSON response for a track listing; skips per-item model validation.
+
+    With `request`, the response carries a content-hash ETag and a matching
+    If-None-Match gets an empty 304 (for a cached TrackList, without encoding
+    anything). `cache` is the Cache-Control value.
+    """
+    headers = {}
+    if cache:
+        # An empty list is usually a swallowed upstream error; keep it out of shared caches
+        headers["Cache-Control"] = cache if tracks else "no-store"
+    if request is not None:
+        etag = tracks.etag() if isinstance(tracks, TrackList) else content_etag(encode_tracks(tracks))
+        headers["ETag"] = etag
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+    return Response(content=encode_tracks(tracks), media_type="application/json", headers=headers)
+
+
+def shelves_response(shelves, request=None, cache=None):
+    """
+    `{"shelves": [{"category": ..., "tracks": [...]}, ...]}` for [(category, tracks)].
+    Each shelf's tracks are spliced in as already-encoded JSON, so cached pages cost
+    no serialization. ETag and Cache-Control work as in tracks_response.
+    """
+    body = b'{"shelves":[' + b",".join(
+        b'{"category":' + dumps(category) + b',"tracks":' + encode_tracks(tracks) + b"}" for category, tracks in shelves
+    ) + b"]}"
+    headers = {}
+    if cache:
+        # One empty shelf is usually a swallowed upstream error; don't let the edge keep it
+        headers["Cache-Control"] = cache if all(tracks for _, tracks in shelves) else "no-store"
+    if request is not None:
+        etag = headers["ETag"] = content_etag(body)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def ndjson_tracks(tracks, next_cursor):
+    """
+    Newline-delimited JSON: one track per line as soon as it is available, then a
+    final `{"nextCursor": ...}` line. `next_cursor(count)` builds the cursor from the
+    number of tracks sent. Errors after the first byte can't change the status code,
+    so they end the stream with an `error` line instead.
+    """
+    count = 0
+    try:
+        async for track in tracks:
+            count += 1
+            yield dumps(track_payload(track)) + b"\n"
+        yield dumps({"nextCursor": next_cursor(count)}) + b"\n"
+    except Exception as e:
+        print(f"Stream Error: {e}")
+        yield dumps({"nextCursor": None, "error": "Listing failed"}) + b"\n"
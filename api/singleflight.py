@@ -0,0 +1,39 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: the first caller for a key starts the work,
+    everyone else arriving while it is in flight awaits the same task and gets the
+    same result (or exception). Nothing is remembered once the call finishes.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def in_flight(self):
+        return len(self._calls)
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.started += 1
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        # Shielded so one waiter being cancelled doesn't cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {"in_flight": len(self._calls), "started": self.started, "coalesced": self.coalesced}
@@ -0,0 +1,120 @@
+import asyncio
+import random
+import time
+import uuid
+from collections import OrderedDict, deque
+
+
+class StationSession:
+    """
+    Server-side "infinite flow" queue for one listener's station.
+
+    Tracks are handed out from a local buffer; once it drops below `low_water` a
+    background refill fetches recommendations seeded from the last queued track,
+    skipping anything this station has already played or queued.
+    """
+
+    def __init__(self, seed_id, fetch, low_water=5, max_seen=1000):
+        self.seed_id = seed_id
+        self.fetch = fetch # async (song_id) -> list of normalized tracks
+        self.low_water = low_water
+        self.max_seen = max_seen
+        self.buffer = deque()
+        self.seen = {seed_id}
+        self.next_seed = seed_id
+        self.last_used = time.monotonic()
+        self._refill_task = None
+
+    async def take(self, n=1):
+        self.last_used = time.monotonic()
+        if len(self.buffer) < n:
+            # Only the very first call (or a drained buffer) waits on upstream
+            await self.refill()
+
+        tracks = [self.buffer.popleft() for _ in range(min(n, len(self.buffer)))]
+        if len(self.buffer) < self.low_water:
+            self.refill_in_background()
+        return tracks
+
+    def refill_in_background(self):
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._fill())
+        return self._refill_task
+
+    async def refill(self):
+        await asyncio.shield(self.refill_in_background())
+
+    async def _fill(self):
+        try:
+            tracks = await self.fetch(self.next_seed)
+        except Exception as e:
+            print(f"Station Refill Error: {e}")
+            return
+
+        if len(self.seen) > self.max_seen:
+            self.seen = {self.seed_id} | {t["id"] for t in self.buffer}
+
+        added = 0
+        for track in tracks:
+            if track.get("id") and track["id"] not in self.seen:
+                self.seen.add(track["id"])
+                self.buffer.append(track)
+                added += 1
+
+        # Seed the next refill from the newest track so the station keeps drifting,
+        # or from a random earlier one if this seed only gave us repeats
+        if added:
+            self.next_seed = self.buffer[-1]["id"]
+        else:
+            self.next_seed = random.choice(list(self.seen))
+
+    def close(self):
+        if self._refill_task and not self._refill_task.done():
+            self._refill_task.cancel()
+
+
+class StationRegistry:
+    """
+    Station sessions keyed by a station id handed out by create(), so listeners who
+    start from the same seed track still get their own queues. Bounded by count and
+    idle time.
+    """
+
+    def __init__(self, fetch, max_sessions=1000, idle_ttl=1800.0, low_water=5):
+        self.fetch = fetch
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.low_water = low_water
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, seed_id):
+        """Start a station from `seed_id` and return its id."""
+        self._evict_idle()
+        station_id = str(uuid.uuid4())
+        session = self._sessions[station_id] = StationSession(seed_id, self.fetch, low_water=self.low_water)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)[1].close()
+        # Start filling now so the first track is ready by the time the current song ends
+        session.refill_in_background()
+        return station_id
+
+    def get(self, station_id):
+        """The session for `station_id`, or None if it is unknown or has expired."""
+        self._evict_idle()
+        session = self._sessions.get(station_id)
+        if session is not None:
+            self._sessions.move_to_end(station_id)
+        return session
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        # Ordered by last access, so idle sessions are at the front
+        while self._sessions:
+            station_id, session = next(iter(self._sessions.items()))
+            if session.last_used >= cutoff:
+                break
+            del self._sessions[station_id]
+            session.close()
@@ -0,0 +1,126 @@
+import bisect
+import heapq
+import re
+import unicodedata
+from collections import OrderedDict
+
+from serialization import TrackList
+
+_WORD = re.compile(r"\w+")
+
+# Where a term matched decides the rank: title beats artist beats album
+FIELD_WEIGHTS = (("title", 3), ("artist", 2), ("album", 1))
+
+
+def tokenize(text):
+    # Case- and accent-insensitive: "Beyoncé" is found by "beyo"
+    text = unicodedata.normalize("NFKD", text or "").casefold()
+    return _WORD.findall("".join(c for c in text if not unicodedata.combining(c)))
+
+
+class SuggestIndex:
+    """
+    In-memory typeahead index over title, artist and album of tracks the backend has seen.
+
+    Every distinct word maps to the ids of tracks containing it, and the words are kept
+    in a sorted list so a prefix is a bisect away. The index holds at most `max_tracks`
+    tracks; the least recently seen ones are dropped first.
+    """
+
+    def __init__(self, max_tracks=50000):
+        self.max_tracks = max_tracks
+        self._tracks = OrderedDict() # id -> (track, {field: tokens})
+        self._postings = {} # word -> {id: weight of the best field containing it}
+        self._words = [] # sorted keys of _postings
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def add(self, track):
+        """Index a tracks.Track record."""
+        song_id = track.id
+        if not song_id:
+            return
+        if song_id in self._tracks:
+            old, fields = self._tracks[song_id]
+            if all(getattr(old, name) == getattr(track, name) for name, _ in FIELD_WEIGHTS):
+                # Seen again with the same text: refresh recency, skip re-indexing
+                self._tracks[song_id] = (track, fields)
+                self._tracks.move_to_end(song_id)
+                return
+            self._remove(song_id)
+        fields = {name: tokenize(getattr(track, name)) for name, _ in FIELD_WEIGHTS}
+        self._tracks[song_id] = (track, fields)
+        for name, weight in FIELD_WEIGHTS:
+            for word in fields[name]:
+                ids = self._postings.get(word)
+                if ids is None:
+                    ids = self._postings[word] = {}
+                    bisect.insort(self._words, word)
+                if ids.get(song_id, 0) < weight:
+                    ids[song_id] = weight
+        while len(self._tracks) > self.max_tracks:
+            self._remove(next(iter(self._tracks)))
+            self.evictions += 1
+
+    def add_many(self, tracks):
+        for track in tracks:
+            self.add(track)
+
+    def _remove(self, song_id):
+        _, fields = self._tracks.pop(song_id)
+        for word in {w for tokens in fields.values() for w in tokens}:
+            ids = self._postings[word]
+            ids.pop(song_id, None)
+            if not ids:
+                del self._postings[word]
+                del self._words[bisect.bisect_left(self._words, word)]
+
+    def _ids_with_prefix(self, prefix, limit):
+        # id -> best field weight among words starting with `prefix`
+        ids = {}
+        words = self._words
+        i = bisect.bisect_left(words, prefix)
+        while i < len(words) and words[i].startswith(prefix) and len(ids) < limit:
+            for song_id, weight in self._postings[words[i]].items():
+                if ids.get(song_id, 0) < weight:
+                    ids[song_id] = weight
+            i += 1
+        return ids
+
+    def search(self, query, limit=10, max_candidates=300):
+        """
+        Tracks where every term of `query` prefixes some word, best matches first.
+
+        Very short prefixes ("a") match most of the index, so only the first
+        `max_candidates` tracks are ranked to keep lookups under a millisecond.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return TrackList()
+
+        first = terms[0]
+        # Start from the most selective (longest) term, then filter by the others
+        terms.sort(key=len, reverse=True)
+        candidates = self._ids_with_prefix(terms[0], max_candidates)
+
+        scored = []
+        for song_id, score in candidates.items():
+            track, fields = self._tracks[song_id]
+            for term in terms[1:]:
+                # FIELD_WEIGHTS is ordered best first, so the first field that matches wins
+                best = next((weight for name, weight in FIELD_WEIGHTS if any(w.startswith(term) for w in fields[name])), 0)
+                if not best:
+                    break
+                score += best
+            else:
+                # A title that starts with the query goes first
+                if fields["title"] and fields["title"][0].startswith(first):
+                    score += 1
+                scored.append((score, song_id, track))
+
+        return TrackList(track.to_song() for _, _, track in heapq.nlargest(limit, scored, key=lambda item: item[0]))
+
+    def stats(self):
+        return {"tracks": len(self._tracks), "words": len(self._words), "max_tracks": self.max_tracks, "evictions": self.evictions}
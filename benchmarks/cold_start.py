@@ -0,0 +1,92 @@
+"""
+Cold-start benchmark for the serverless entry point (api/index.py).
+
+Imports the module in fresh interpreters, reports per-run import time plus the
+module's own startup report, and exits non-zero when the median import time is
+over budget so it can gate CI:
+
+    python benchmarks/cold_start.py --runs 7 --budget-ms 800 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+PROBE = """
+import json, time
+t = time.perf_counter()
+import index
+import_ms = (time.perf_counter() - t) * 1000
+print(json.dumps({"import_ms": import_ms, "startup": index.startup.report()}))
+"""
+
+
+def run_once(importtime=False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", PROBE]
+    proc = subprocess.run(cmd, cwd=API_DIR, capture_output=True, text=True, env={**os.environ, "EAGER_STARTUP": "0"})
+    if proc.returncode != 0:
+        raise RuntimeError(f"import failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def top_imports(importtime_log, limit=15):
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        name = parts[2].rstrip()
+        # Nesting is shown as two extra spaces per level; keep the top two levels
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            rows.append((int(parts[1]), name.strip()))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(us / 1000, 2)} for us, name in rows[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("COLD_START_BUDGET_MS", "800")))
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    runs = [run_once()[0] for _ in range(args.runs)]
+    _, importtime_log = run_once(importtime=True)
+
+    import_ms = [r["import_ms"] for r in runs]
+    result = {
+        "runs": args.runs,
+        "import_ms": {
+            "median": round(statistics.median(import_ms), 2),
+            "min": round(min(import_ms), 2),
+            "max": round(max(import_ms), 2),
+        },
+        "budget_ms": args.budget_ms,
+        "startup": runs[-1]["startup"],
+        "top_imports": top_imports(importtime_log),
+    }
+    result["passed"] = result["import_ms"]["median"] <= args.budget_ms
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"cold import: median {result['import_ms']['median']} ms "
+              f"(min {result['import_ms']['min']}, max {result['import_ms']['max']}) budget {args.budget_ms} ms")
+        for row in result["top_imports"]:
+            print(f"  {row['cumulative_ms']:>9.2f} ms  {row['module']}")
+        print("PASS" if result["passed"] else "FAIL: import time over budget")
+
+    sys.exit(0 if result["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Local stand-in for jiosaavn.com used by the benchmarks.
+
+Serves recorded `search.getResults`, `song.getDetails` and `webradio.getSong`
+payloads from benchmarks/fixtures on /api.php, plus fake audio files on /audio/
+(with Range support) for download runs. Latency, jitter and error rate are
+configurable so runs are repeatable without touching the real upstream:
+
+    python benchmarks/fake_upstream.py --port 9000 --latency-ms 80 --jitter-ms 30 --error-rate 0.01
+
+Point the app at it with JIOSAAVN_BASE_URL=http://127.0.0.1:9000/api.php.
+"""
+import argparse
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(call):
+    with open(os.path.join(FIXTURES_DIR, f"{call}.json")) as f:
+        return json.load(f)
+
+
+def _suffix(*parts):
+    # Distinct queries/seeds get distinct track ids so caches behave like production
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=3).hexdigest()
+
+
+def create_app(latency_ms=50.0, jitter_ms=20.0, error_rate=0.0, audio_kb=512, seed=None):
+    app = FastAPI()
+    rng = random.Random(seed)
+    search = load_fixture("search.getResults")
+    details = load_fixture("song.getDetails")["songs"]
+    radio = load_fixture("webradio.getSong")
+    audio = bytes(rng.getrandbits(8) for _ in range(1024)) * audio_kb
+    app.state.calls = {}
+
+    async def delay():
+        await asyncio.sleep(max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+    @app.get("/api.php")
+    async def api(request: Request):
+        params = request.query_params
+        call = params.get("__call", "")
+        app.state.calls[call] = app.state.calls.get(call, 0) + 1
+        await delay()
+        if rng.random() < error_rate:
+            return JSONResponse({"error": "fake upstream failure"}, status_code=rng.choice([429, 500, 503]))
+
+        if call == "search.getResults":
+            suffix = _suffix(params.get("q", ""), params.get("p", "1"))
+            size = int(params.get("n", "20"))
+            results = []
+            for i in range(size):
+                item = copy.copy(search["results"][i % len(search["results"])])
+                item["id"] = f"{item['id']}{suffix}{i // len(search['results']) or ''}"
+                results.append(item)
+            return {**search, "results": results}
+
+        if call == "song.getDetails":
+            pids = [p for p in params.get("pids", "").split(",") if p]
+            songs = []
+            for pid in pids:
+                item = copy.copy(details[int(_suffix(pid), 16) % len(details)])
+                item["id"] = pid
+                songs.append(item)
+            if len(songs) == 1:
+                return {pids[0]: songs[0]}
+            return {"songs": songs}
+
+        if call == "webradio.getSong":
+            suffix = _suffix(params.get("stationid", ""))
+            out = {}
+            for key, item in radio.items():
+                if isinstance(item, dict):
+                    item = {**item, "id": f"{item['id']}{suffix}"}
+                out[key] = item
+            return out
+
+        return JSONResponse({"error": f"unknown __call {call}"}, status_code=400)
+
+    @app.get("/audio/{name}")
+    async def audio_file(name: str, request: Request):
+        await delay()
+        total = len(audio)
+        range_header = request.headers.get("range")
+        if range_header and range_header.startswith("bytes="):
+            start_s, _, end_s = range_header[6:].partition("-")
+            start = int(start_s or 0)
+            end = int(end_s) if end_s else total - 1
+            if start >= total:
+                return Response(status_code=416, headers={"Content-Range": f"bytes */{total}"})
+            return Response(
+                audio[start:end + 1], status_code=206, media_type="audio/mp4",
+                headers={"Content-Range": f"bytes {start}-{end}/{total}", "Accept-Ranges": "bytes"},
+            )
+        return Response(audio, media_type="audio/mp4", headers={"Accept-Ranges": "bytes"})
+
+    return app
+
+
+class FakeUpstream:
+    """Runs the fake upstream with uvicorn in a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        self.app = create_app(**config)
+        self.config = uvicorn.Config(self.app, host=host, port=port, log_level="warning", access_log=False)
+        self.server = uvicorn.Server(self.config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+    @property
+    def base_url(self):
+        sock = self.server.servers[0].sockets[0]
+        host, port = sock.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def calls(self):
+        return dict(self.app.state.calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--audio-kb", type=int, default=512)
+    args = parser.parse_args()
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.audio_kb)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Offline load benchmark for the FastAPI backends.
+
+Starts the fake JioSaavn upstream (benchmarks/fake_upstream.py), boots each target
+app in its own uvicorn process pointed at it, and drives /api/search, /api/charts,
+/api/recommendations and /api/download at the given concurrency levels. A download
+is timed until its job finishes (polled through /api/status), not just the enqueue,
+and every one is a new track so the audio cache can't answer it. Results
+(throughput, p50/p95/p99 latency, error counts, upstream call counts) are written
+as JSON with stable keys so runs can be diffed between commits:
+
+    python benchmarks/load.py --targets server,api --concurrency 1,16,64 \\
+        --requests 400 --latency-ms 80 --jitter-ms 30 --output bench.json
+
+Scenarios run in order against one process per target, so later concurrency
+levels see whatever the earlier ones left in the caches (as production would).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_upstream import FakeUpstream
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TARGETS = {
+    "server": (os.path.join(ROOT, "server"), "main:app"),
+    "api": (os.path.join(ROOT, "api"), "index:app"),
+}
+SCENARIOS = ("search", "charts", "recommendations", "download")
+
+# A skewed mix: a few popular queries repeat, the tail is unique
+QUERIES = ["arijit singh", "lofi beats", "phonk", "kesariya", "the weeknd", "punjabi hits"]
+CATEGORIES = ["all", "phonk", "bollywood", "old", "hollywood", "japanese", "lofi", "punjabi"]
+
+# Unique across levels and targets, so every download job really fetches
+DOWNLOAD_IDS = itertools.count()
+JOB_FINISHED = ("completed", "failed", "error")
+JOB_POLL_INTERVAL = 0.025 # seconds; the resolution of the download timings
+
+
+def request_for(scenario, n, upstream_url):
+    if scenario == "search":
+        query = QUERIES[n % len(QUERIES)] if n % 4 else f"tail query {n}"
+        return "GET", "/api/search", {"params": {"query": query}}
+    if scenario == "charts":
+        return "GET", "/api/charts", {"params": {"category": CATEGORIES[n % len(CATEGORIES)]}}
+    if scenario == "recommendations":
+        return "GET", f"/api/recommendations/seed{n % 50}", {}
+    if scenario == "download":
+        track = next(DOWNLOAD_IDS)
+        return "POST", "/api/download", {"json": {
+            "url": f"{upstream_url}/audio/track{track}.mp4",
+            "title": f"Bench Track {track}",
+            "artist": "Bench",
+            "thumbnail": "",
+            "videoId": f"bench{track}",
+        }}
+    raise ValueError(scenario)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # Nearest-rank
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return round(sorted_values[index], 2)
+
+
+async def wait_for_job(client, job_id, timeout=60.0):
+    """Poll /api/status until the download job finishes; True if it completed."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        status = (await client.get(f"/api/status/{job_id}")).json().get("status")
+        if status in JOB_FINISHED:
+            return status == "completed"
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+    return False
+
+
+async def run_level(client, scenario, concurrency, total, upstream_url):
+    counter = itertools.count()
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while (n := next(counter)) < total:
+            method, path, kwargs = request_for(scenario, n, upstream_url)
+            t = time.perf_counter()
+            try:
+                resp = await client.request(method, path, **kwargs)
+                if resp.status_code >= 400:
+                    errors += 1
+                elif scenario == "download" and not await wait_for_job(client, resp.json()["job_id"]):
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_target(name, upstream_url, workdir):
+    app_dir, app_path = TARGETS[name]
+    port = free_port()
+    env = {
+        **os.environ,
+        "JIOSAAVN_BASE_URL": f"{upstream_url}/api.php",
+        # Start every run cold; the persistent tier would otherwise carry over between runs
+        "JIOSAAVN_SQLITE_PATH": "",
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--app-dir", app_dir, app_path,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=workdir, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/openapi.json", timeout=1).status_code == 200:
+                return proc, base_url
+        except httpx.HTTPError:
+            pass
+        if proc.poll() is not None:
+            break
+        time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{name} failed to start")
+
+
+async def bench_target(base_url, upstream_url, scenarios, levels, total):
+    results = {}
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        for scenario in scenarios:
+            results[scenario] = {}
+            for concurrency in levels:
+                stats = await run_level(client, scenario, concurrency, total, upstream_url)
+                results[scenario][f"c{concurrency}"] = stats
+                print(f"  {scenario:<16} c={concurrency:<4} {stats['throughput_rps']:>9} rps  "
+                      f"p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  p99 {stats['p99_ms']} ms  "
+                      f"errors {stats['errors']}", file=sys.stderr)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", default="server,api")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,16,64")
+    parser.add_argument("--requests", type=int, default=400, help="requests per scenario and concurrency level")
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter-ms", type=float, default=30.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--audio-kb", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    targets = [t for t in args.targets.split(",") if t]
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    upstream_config = {
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "error_rate": args.error_rate,
+        "audio_kb": args.audio_kb,
+        "seed": args.seed,
+    }
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests_per_level": args.requests,
+            "concurrency": levels,
+            "upstream": upstream_config,
+        },
+        "results": {},
+        "upstream_calls": {},
+    }
+
+    with FakeUpstream(**upstream_config) as upstream, tempfile.TemporaryDirectory() as workdir:
+        for name in targets:
+            print(f"{name}:", file=sys.stderr)
+            before = upstream.calls
+            proc, base_url = start_target(name, upstream.base_url, workdir)
+            try:
+                report["results"][name] = asyncio.run(
+                    bench_target(base_url, upstream.base_url, scenarios, levels, args.requests)
+                )
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+            after = upstream.calls
+            report["upstream_calls"][name] = {k: after[k] - before.get(k, 0) for k in sorted(after)}
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
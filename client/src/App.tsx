@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState } from 'react';
 import axios from 'axios';
 import Layout from './components/Layout';
 import Sidebar from './components/Sidebar';
@@ -6,6 +6,8 @@ import Player from './components/Player';
 import Home from './pages/Home';
 import Search from './pages/Search';
 import Library from './pages/Library'; // New Import
+import { playbackQuality } from './lib/quality';
+import { API_STREAMS } from './lib/api';
 
 // --- Types ---
 interface Song {
@@ -16,6 +18,7 @@ interface Song {
   thumbnail: string;
   duration?: string;
   streamUrl?: string; // Direct audio URL
+  streamToken?: string; // Listings carry this instead of streamUrl
 }
 
 interface DownloadJob {
@@ -26,6 +29,9 @@ interface DownloadJob {
 }
 
 const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+// Play through the backend's audio cache instead of straight from the CDN. Server-only:
+// the serverless API can't stream audio (see lib/api.ts), so it is ignored there.
+const STREAM_VIA_API = import.meta.env.VITE_STREAM_VIA_API === 'true' && API_STREAMS;
 
 function App() {
   // Navigation State
@@ -38,25 +44,67 @@ function App() {
   const [volume, setVolume] = useState(0.8);
   const [played, setPlayed] = useState(0);
   const [duration, setDuration] = useState(0);
+  // Radio station started from the song the user picked (the server keeps one queue per station)
+  const [station, setStation] = useState<{ id: string; seed: string } | null>(null);
 
   // Download State
   const [jobs, setJobs] = useState<{ [key: string]: DownloadJob }>({});
-  const [activeDownloads, setActiveDownloads] = useState<string[]>([]);
 
   // --- Handlers ---
 
-  const handlePlay = (song: Song) => {
-    setCurrentSong(song);
+  // Listings only carry a streamToken; exchange it for a playable URL on demand.
+  // Playback gets a bitrate suited to the connection; downloads always get 320 kbps.
+  const resolveStream = async (song: Song, forPlayback = true): Promise<Song> => {
+    const quality = forPlayback ? playbackQuality() : { quality: '320' };
+    if (STREAM_VIA_API && forPlayback) {
+      return { ...song, streamUrl: `${API_BASE}/api/stream/${song.videoId}?${new URLSearchParams(quality)}` };
+    }
+    if (song.streamUrl) return song;
+    try {
+      const res = await axios.get(`${API_BASE}/api/resolve/${song.videoId}`, { params: { token: song.streamToken, ...quality } });
+      return { ...song, streamUrl: res.data.streamUrl };
+    } catch (err) {
+      console.error("Failed to resolve stream", err);
+      return song;
+    }
+  };
+
+  const startStation = async (seed: string) => {
+    const res = await axios.post(`${API_BASE}/api/stations/${seed}`);
+    const started = { id: res.data.station_id, seed };
+    setStation(started);
+    return started;
+  };
+
+  // Next tracks from the current station, starting it over from its seed if the server forgot it
+  const nextFromStation = async (seed: string): Promise<Song[]> => {
+    const current = station || await startStation(seed);
+    const next = (id: string) => axios.get(`${API_BASE}/api/stations/${id}/next`, { params: { n: 1 } });
+    try {
+      return (await next(current.id)).data;
+    } catch (err) {
+      if (!axios.isAxiosError(err) || err.response?.status !== 404) throw err;
+      return (await next((await startStation(current.seed)).id)).data;
+    }
+  };
+
+  const handlePlay = async (song: Song) => {
+    // Start the station right away so its queue is filled by the time the song ends
+    setStation(null);
+    startStation(song.videoId).catch(err => console.error("Failed to start station", err));
+    setCurrentSong(await resolveStream(song));
     setIsPlaying(true);
   };
 
   const startDownload = async (song: Song) => {
     try {
+      song = await resolveStream(song, false);
       const downloadPayload = {
         url: song.streamUrl || "",
         title: song.title,
         artist: song.artist,
-        thumbnail: song.thumbnail
+        thumbnail: song.thumbnail,
+        videoId: song.videoId
       };
 
       if (!downloadPayload.url) {
@@ -71,7 +119,7 @@ function App() {
 
       const jobId = res.data.job_id;
       setJobs(prev => ({ ...prev, [jobId]: { status: 'queued', progress: 0 } }));
-      setActiveDownloads(prev => [...prev, jobId]);
+      watchJob(jobId);
     } catch (err) {
       console.error("Download failed", err);
     }
@@ -86,8 +134,11 @@ function App() {
 
     try {
       console.log("Fetching recommendation for:", currentSong.title);
-      const res = await axios.get(`${API_BASE}/api/recommendations/${currentSong.videoId}`);
-      const nextSongs = res.data;
+      // Next track comes from the station's pre-filled server-side queue
+      let nextSongs = await nextFromStation(currentSong.videoId);
+      if (!nextSongs || nextSongs.length === 0) {
+        nextSongs = (await axios.get(`${API_BASE}/api/recommendations/${currentSong.videoId}`)).data;
+      }
 
       if (nextSongs && nextSongs.length > 0) {
         // Filter out current song to prevent repeat loop
@@ -99,11 +150,12 @@ function App() {
           artist: next.artist,
           album: next.album,
           thumbnail: next.thumbnail,
-          streamUrl: next.streamUrl
+          streamUrl: next.streamUrl,
+          streamToken: next.streamToken
         };
 
         console.log("Auto-playing next:", songObj.title);
-        setCurrentSong(songObj);
+        setCurrentSong(await resolveStream(songObj));
         setIsPlaying(true);
       } else {
         setIsPlaying(false);
@@ -114,30 +166,29 @@ function App() {
     }
   };
 
-  // Poll for download status
-  useEffect(() => {
-    if (activeDownloads.length === 0) return;
-
-    const interval = setInterval(async () => {
-      for (const jobId of activeDownloads) {
-        try {
-          const res = await axios.get(`${API_BASE}/api/status/${jobId}`);
-          setJobs(prev => ({ ...prev, [jobId]: res.data }));
-
-          if (['completed', 'failed', 'error'].includes(res.data.status)) {
-            setActiveDownloads(prev => prev.filter(id => id !== jobId));
-          }
-        } catch (err) {
-          console.error(err);
-        }
+  // Download progress is pushed over Server-Sent Events instead of polling /api/status
+  const watchJob = (jobId: string) => {
+    const source = new EventSource(`${API_BASE}/api/events/${jobId}`);
+    source.addEventListener('progress', (e) => {
+      const job = JSON.parse((e as MessageEvent).data);
+      setJobs(prev => ({ ...prev, [jobId]: job }));
+      if (['completed', 'failed', 'error'].includes(job.status)) source.close();
+    });
+    source.onerror = async () => {
+      // Stream unavailable (e.g. serverless): take one final status snapshot instead
+      source.close();
+      try {
+        const res = await axios.get(`${API_BASE}/api/status/${jobId}`);
+        setJobs(prev => ({ ...prev, [jobId]: res.data }));
+      } catch (err) {
+        console.error(err);
       }
-    }, 1500);
-
-    return () => clearInterval(interval);
-  }, [activeDownloads]);
+    };
+  };
 
-  const saveFile = (filename: string) => {
-    window.open(`${API_BASE}/api/files/${filename}`, '_blank');
+  // The job id lets the server name the file after the track instead of its cache key
+  const saveFile = (jobId: string, filename: string) => {
+    window.open(`${API_BASE}/api/files/${filename}?${new URLSearchParams({ job: jobId })}`, '_blank');
   };
 
   return (
@@ -190,7 +241,7 @@ function App() {
                     'text-cyan-400 font-bold'
               }>{job.status.toUpperCase()}</span>
               {job.status === 'completed' && (
-                <button onClick={() => saveFile(job.file!)} className="text-xs bg-green-500 text-black px-3 py-1 rounded-full font-bold hover:scale-105">SAVE</button>
+                <button onClick={() => saveFile(id, job.file!)} className="text-xs bg-green-500 text-black px-3 py-1 rounded-full font-bold hover:scale-105">SAVE</button>
               )}
             </div>
             <div className="h-1 bg-white/10 rounded-full overflow-hidden">
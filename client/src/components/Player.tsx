@@ -1,5 +1,6 @@
 import { useRef, useEffect, useState } from 'react';
 import { Play, Pause, SkipBack, SkipForward, Volume2, ListMusic, Heart, Maximize2, Minimize2, Download, Gauge, Repeat, Shuffle } from 'lucide-react';
+import { artworkUrl } from '../lib/images';
 
 interface Song {
     videoId: string;
@@ -93,7 +94,7 @@ const Player = ({
             >
                 {/* Left: Current Song */}
                 <div className="flex items-center gap-4 w-[30%] min-w-[200px]">
-                    <img src={currentSong.thumbnail} className="h-14 w-14 rounded-lg object-cover shadow-lg border border-white/5" alt="cover" />
+                    <img src={artworkUrl(currentSong.thumbnail, 'thumb')} className="h-14 w-14 rounded-lg object-cover shadow-lg border border-white/5" alt="cover" />
                     <div className="flex flex-col justify-center overflow-hidden">
                         <span className="font-bold text-sm text-white hover:underline truncate">{currentSong.title}</span>
                         <span className="text-xs text-gray-400 hover:text-white truncate">{currentSong.artist}</span>
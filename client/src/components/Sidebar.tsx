@@ -1,5 +1,6 @@
 import { Home, Search, Library, PlusSquare, Heart, Music } from 'lucide-react';
 import clsx from 'clsx';
+import { CATEGORIES } from '../lib/categories';
 
 interface SidebarProps {
     activeTab: 'home' | 'search' | 'library';
@@ -8,17 +9,6 @@ interface SidebarProps {
     onSelectCategory: (cat: string) => void;
 }
 
-const CATEGORIES = [
-    { id: 'all', label: 'All Trends' },
-    { id: 'phonk', label: 'Phonk' },
-    { id: 'bollywood', label: 'Bollywood' },
-    { id: 'old', label: 'Old Classics' },
-    { id: 'hollywood', label: 'Hollywood' },
-    { id: 'japanese', label: 'Japanese' },
-    { id: 'punjabi', label: 'Punjabi' },
-    { id: 'lofi', label: 'Lofi Beats' },
-];
-
 const SidebarItem = ({ icon: Icon, label, active, onClick }: any) => (
     <div
         onClick={onClick}
@@ -1,4 +1,6 @@
 import { Play, Download } from 'lucide-react';
+import { artworkUrl } from '../lib/images';
+import type { Artwork } from '../lib/images';
 
 interface Song {
     videoId: string;
@@ -6,6 +8,7 @@ interface Song {
     artist: string;
     album: string;
     thumbnail: string;
+    artwork?: Artwork;
     duration?: string;
 }
 
@@ -22,7 +25,7 @@ const SongCard = ({ song, onPlay, onDownload }: SongCardProps) => {
             <div className="absolute inset-0 bg-gradient-to-br from-purple-500/10 to-cyan-500/10 opacity-0 group-hover:opacity-100 transition-opacity duration-500 pointer-events-none" />
 
             <div className="relative aspect-square rounded-lg overflow-hidden shadow-lg mb-1 group-hover:shadow-2xl transition-shadow">
-                <img src={song.thumbnail} alt={song.title} className="w-full h-full object-cover transform group-hover:scale-110 transition-transform duration-500" />
+                <img src={artworkUrl(song.thumbnail, 'card', song.artwork)} alt={song.title} loading="lazy" className="w-full h-full object-cover transform group-hover:scale-110 transition-transform duration-500" />
 
                 {/* Play Overlay */}
                 <div className="absolute inset-0 bg-black/40 opacity-0 group-hover:opacity-100 transition-opacity duration-300 flex items-center justify-center">
@@ -0,0 +1,7 @@
+const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+
+// Whether API responses reach the browser as they are written. The Vercel deploy
+// (VITE_API_URL="/", see the README) runs the API behind Mangum, which buffers every
+// response whole, so NDJSON, audio streaming and ZIP exports only work against
+// server/main.py. Set VITE_API_SERVERLESS to override the guess.
+export const API_STREAMS = (import.meta.env.VITE_API_SERVERLESS ?? String(API_BASE === '/')) !== 'true';
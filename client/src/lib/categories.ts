@@ -0,0 +1,11 @@
+// Chart categories the backend knows (CAT_MAP in the API), in sidebar order
+export const CATEGORIES = [
+    { id: 'all', label: 'All Trends' },
+    { id: 'phonk', label: 'Phonk' },
+    { id: 'bollywood', label: 'Bollywood' },
+    { id: 'old', label: 'Old Classics' },
+    { id: 'hollywood', label: 'Hollywood' },
+    { id: 'japanese', label: 'Japanese' },
+    { id: 'punjabi', label: 'Punjabi' },
+    { id: 'lofi', label: 'Lofi Beats' },
+];
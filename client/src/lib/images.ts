@@ -0,0 +1,18 @@
+const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+
+export type ArtworkSlot = 'thumb' | 'card';
+export type Artwork = Partial<Record<ArtworkSlot, string>> | null;
+
+// Edge length the backend serves per slot (about 2x the CSS size, for high-DPI screens)
+const SLOT_SIZES: Record<ArtworkSlot, number> = { thumb: 150, card: 250 };
+
+// Right-sized artwork through the /api/image proxy. Listings already carry the proxy
+// path per slot; saved songs only have the raw CDN URL, so build it from that.
+export function artworkUrl(thumbnail: string, slot: ArtworkSlot, artwork?: Artwork): string {
+    const path = artwork?.[slot];
+    if (path) return `${API_BASE}${path}`;
+    if (thumbnail && thumbnail.includes('.saavncdn.com/')) {
+        return `${API_BASE}/api/image?${new URLSearchParams({ size: String(SLOT_SIZES[slot]), src: thumbnail })}`;
+    }
+    return thumbnail;
+}
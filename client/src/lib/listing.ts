@@ -0,0 +1,62 @@
+import { API_STREAMS } from './api';
+
+const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+
+// Streams one page of a listing endpoint (/api/search, /api/charts) as NDJSON.
+// `onTrack` runs for every track as soon as its line arrives; resolves to the
+// cursor for the next page, or null on the last page.
+export async function streamListing<T>(
+    path: string,
+    params: Record<string, string>,
+    onTrack: (track: T) => void,
+    signal?: AbortSignal,
+): Promise<string | null> {
+    // A buffered (serverless) API would only send the NDJSON once the page is complete anyway
+    if (!API_STREAMS) return fetchListing(path, params, onTrack, signal);
+
+    const query = new URLSearchParams({ ...params, format: 'ndjson' });
+    const res = await fetch(`${API_BASE}${path}?${query}`, { signal });
+    if (!res.ok || !res.body) throw new Error(`Listing failed: ${res.status}`);
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let nextCursor: string | null = null;
+
+    const handleLine = (line: string) => {
+        if (!line.trim()) return;
+        const item = JSON.parse(line);
+        if ('nextCursor' in item) {
+            // Trailer line: end of page
+            if (item.error) throw new Error(item.error);
+            nextCursor = item.nextCursor;
+        } else {
+            onTrack(item as T);
+        }
+    };
+
+    for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop() ?? '';
+        lines.forEach(handleLine);
+    }
+    handleLine(buffer + decoder.decode());
+    return nextCursor;
+}
+
+// Same contract as streamListing, over the plain JSON response and its X-Next-Cursor header
+async function fetchListing<T>(
+    path: string,
+    params: Record<string, string>,
+    onTrack: (track: T) => void,
+    signal?: AbortSignal,
+): Promise<string | null> {
+    const res = await fetch(`${API_BASE}${path}?${new URLSearchParams(params)}`, { signal });
+    if (!res.ok) throw new Error(`Listing failed: ${res.status}`);
+    const tracks: T[] = await res.json();
+    tracks.forEach(onTrack);
+    return res.headers.get('X-Next-Cursor');
+}
@@ -0,0 +1,11 @@
+// Network Information API; not in every browser (or in TypeScript's DOM types)
+type NetworkInfo = { downlink?: number; saveData?: boolean };
+
+// Query params asking the backend to pick a stream bitrate for this connection.
+// `downlink` is the browser's bandwidth estimate in Mbps; the backend wants kbps.
+export function playbackQuality(): Record<string, string> {
+    const connection = (navigator as Navigator & { connection?: NetworkInfo }).connection;
+    if (connection?.saveData) return { quality: '96' };
+    if (!connection?.downlink) return { quality: 'auto' };
+    return { quality: 'auto', bandwidth: String(Math.round(connection.downlink * 1000)) };
+}
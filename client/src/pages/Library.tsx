@@ -1,13 +1,21 @@
 import { useEffect, useState } from 'react';
+import axios from 'axios';
 import { supabase, FavoriteSong } from '../lib/supabase';
-import { Play, Trash2 } from 'lucide-react';
+import { Play, Trash2, Download } from 'lucide-react';
+import { artworkUrl } from '../lib/images';
+import { API_STREAMS } from '../lib/api';
 
 interface LibraryProps {
     onPlay: (song: any) => void;
 }
 
+const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+
+// Hydrated rows also carry the listing token, so playback can pick its bitrate via /api/resolve
+type LibrarySong = FavoriteSong & { stream_token?: string };
+
 const Library = ({ onPlay }: LibraryProps) => {
-    const [songs, setSongs] = useState<FavoriteSong[]>([]);
+    const [songs, setSongs] = useState<LibrarySong[]>([]);
     const [loading, setLoading] = useState(true);
 
     const fetchLibrary = async () => {
@@ -23,6 +31,23 @@ const Library = ({ onPlay }: LibraryProps) => {
             setSongs(data || []);
         }
         setLoading(false);
+        if (data && data.length) hydrateLibrary(data);
+    };
+
+    // Stored stream URLs and thumbnails go stale; refresh them all in one batched call.
+    // Fixed quality here: "auto" would make the server probe the CDN for every saved track.
+    const hydrateLibrary = async (saved: FavoriteSong[]) => {
+        try {
+            const ids = saved.map(s => s.video_id).join(',');
+            const res = await axios.get(`${API_BASE}/api/songs`, { params: { ids } });
+            const fresh = new Map<string, any>(res.data.map((s: any) => [s.videoId, s]));
+            setSongs(saved.map(s => {
+                const f = fresh.get(s.video_id);
+                return f ? { ...s, thumbnail: f.thumbnail || s.thumbnail, stream_url: f.streamUrl || s.stream_url, stream_token: f.streamToken } : s;
+            }));
+        } catch (err) {
+            console.error("Failed to refresh library", err);
+        }
     };
 
     useEffect(() => {
@@ -44,6 +69,17 @@ const Library = ({ onPlay }: LibraryProps) => {
             <h2 className="text-3xl font-bold text-white flex items-center gap-3">
                 <span className="text-transparent bg-clip-text bg-gradient-to-r from-pink-500 to-purple-500">Your Library</span>
                 <span className="text-sm font-normal text-gray-500 bg-white/10 px-3 py-1 rounded-full">{songs.length} Songs</span>
+                {songs.length > 0 && API_STREAMS && (
+                    // One streamed ZIP for the whole library; the browser writes it to disk as it arrives.
+                    // Not offered by the serverless API, which would buffer the whole archive.
+                    <a
+                        href={`${API_BASE}/api/export?${new URLSearchParams({ ids: songs.map(s => s.video_id).join(','), name: 'legeztify-library' })}`}
+                        className="ml-auto flex items-center gap-2 text-sm font-semibold text-cyan-400 hover:text-white bg-white/5 hover:bg-white/10 px-4 py-2 rounded-full transition-colors"
+                    >
+                        <Download size={16} />
+                        Export all
+                    </a>
+                )}
             </h2>
 
             {loading ? (
@@ -64,11 +100,12 @@ const Library = ({ onPlay }: LibraryProps) => {
                                 title: song.title,
                                 artist: song.artist,
                                 thumbnail: song.thumbnail,
-                                streamUrl: song.stream_url
+                                // With a token, the player resolves a bitrate for this connection on play
+                                ...(song.stream_token ? { streamToken: song.stream_token } : { streamUrl: song.stream_url })
                             })}
                             className="flex items-center gap-4 p-3 rounded-xl bg-white/5 hover:bg-white/10 transition-colors cursor-pointer group"
                         >
-                            <img src={song.thumbnail} className="w-12 h-12 rounded-lg object-cover" alt={song.title} />
+                            <img src={artworkUrl(song.thumbnail, 'thumb')} loading="lazy" className="w-12 h-12 rounded-lg object-cover" alt={song.title} />
                             <div className="flex-1">
                                 <h4 className="font-bold text-white group-hover:text-cyan-400 transition-colors">{song.title}</h4>
                                 <p className="text-xs text-gray-400">{song.artist}</p>
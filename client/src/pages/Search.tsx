@@ -1,6 +1,9 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import SongCard from '../components/SongCard';
+import { streamListing } from '../lib/listing';
+import { artworkUrl } from '../lib/images';
+import type { Artwork } from '../lib/images';
 import { Search as SearchIcon, Music } from 'lucide-react';
 
 interface Song {
@@ -9,6 +12,7 @@ interface Song {
     artist: string;
     album: string;
     thumbnail: string;
+    artwork?: Artwork;
 }
 
 interface SearchProps {
@@ -23,6 +27,13 @@ const Search = ({ onPlay, onDownload, initialQuery = '' }: SearchProps) => {
     const [query, setQuery] = useState(initialQuery);
     const [results, setResults] = useState<Song[]>([]);
     const [searching, setSearching] = useState(false);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const activeQuery = useRef('');
+    const pageRequest = useRef<AbortController | null>(null);
+    const sentinelRef = useRef<HTMLDivElement>(null);
+    const [suggestions, setSuggestions] = useState<Song[]>([]);
+    const [showSuggestions, setShowSuggestions] = useState(false);
 
     useEffect(() => {
         if (initialQuery) {
@@ -31,6 +42,25 @@ const Search = ({ onPlay, onDownload, initialQuery = '' }: SearchProps) => {
         }
     }, [initialQuery]);
 
+    // Typeahead: answered from the backend's local index without an upstream call, so a short debounce is enough
+    useEffect(() => {
+        const q = query.trim();
+        if (q.length < 2) {
+            setSuggestions([]);
+            return;
+        }
+        const controller = new AbortController();
+        const timer = setTimeout(() => {
+            axios.get(`${API_BASE}/api/suggest`, { params: { q, limit: 6 }, signal: controller.signal })
+                .then(res => setSuggestions(res.data))
+                .catch(() => {});
+        }, 80);
+        return () => {
+            clearTimeout(timer);
+            controller.abort();
+        };
+    }, [query]);
+
     // Predictive Search (Debounce)
     useEffect(() => {
         if (query.length >= 3) {
@@ -45,18 +75,60 @@ const Search = ({ onPlay, onDownload, initialQuery = '' }: SearchProps) => {
         if (e) e.preventDefault();
         const q = qOverride || query;
         if (!q) return;
+        setShowSuggestions(false);
+
+        // A new query abandons whatever page of the previous one is still streaming
+        pageRequest.current?.abort();
+        const controller = new AbortController();
+        pageRequest.current = controller;
+        activeQuery.current = q;
 
         setSearching(true);
+        setResults([]);
+        setNextCursor(null);
+        try {
+            // Cards render as each NDJSON line arrives (a plain JSON page against the serverless API; see lib/api.ts)
+            const cursor = await streamListing<Song>('/api/search', { query: q }, (song) => {
+                setResults(prev => [...prev, song]);
+            }, controller.signal);
+            setNextCursor(cursor);
+        } catch (err) {
+            if (!controller.signal.aborted) console.error("Search failed", err);
+        } finally {
+            if (pageRequest.current === controller) setSearching(false);
+        }
+    };
+
+    const loadMore = async () => {
+        if (!nextCursor || loadingMore || searching) return;
+        const controller = new AbortController();
+        pageRequest.current = controller;
+
+        setLoadingMore(true);
         try {
-            const res = await axios.get(`${API_BASE}/api/search`, { params: { query: q } });
-            setResults(res.data);
+            // The server prefetches page N+1 while serving page N, so this is usually a cache hit
+            const cursor = await streamListing<Song>('/api/search', { query: activeQuery.current, cursor: nextCursor }, (song) => {
+                setResults(prev => prev.some(s => s.videoId === song.videoId) ? prev : [...prev, song]);
+            }, controller.signal);
+            setNextCursor(cursor);
         } catch (err) {
-            console.error("Search failed", err);
+            if (!controller.signal.aborted) console.error("Loading more results failed", err);
         } finally {
-            setSearching(false);
+            setLoadingMore(false);
         }
     };
 
+    // Infinite scroll: fetch the next page when the sentinel below the grid comes into view
+    useEffect(() => {
+        const sentinel = sentinelRef.current;
+        if (!sentinel || !nextCursor) return;
+        const observer = new IntersectionObserver((entries) => {
+            if (entries[0].isIntersecting) loadMore();
+        }, { rootMargin: '400px' });
+        observer.observe(sentinel);
+        return () => observer.disconnect();
+    }, [nextCursor, loadingMore, searching]);
+
     return (
         <div className="flex flex-col gap-8 min-h-full">
             {/* Search Bar */}
@@ -69,11 +141,39 @@ const Search = ({ onPlay, onDownload, initialQuery = '' }: SearchProps) => {
                                 className="bg-transparent border-none outline-none text-base font-medium w-full placeholder-gray-500 text-white"
                                 placeholder="What do you want to listen to?"
                                 value={query}
-                                onChange={e => setQuery(e.target.value)}
+                                onChange={e => {
+                                    setQuery(e.target.value);
+                                    setShowSuggestions(true);
+                                }}
+                                onFocus={() => setShowSuggestions(true)}
+                                onBlur={() => setShowSuggestions(false)}
                                 autoFocus
                             />
                         </form>
                     </div>
+                    {showSuggestions && suggestions.length > 0 && (
+                        <div className="mt-2 bg-[#1e1e2e] rounded-2xl border border-white/5 overflow-hidden shadow-xl">
+                            {suggestions.map((song) => (
+                                <button
+                                    key={song.videoId}
+                                    type="button"
+                                    // onMouseDown fires before the input's blur hides the list
+                                    onMouseDown={(e) => {
+                                        e.preventDefault();
+                                        setShowSuggestions(false);
+                                        onPlay(song);
+                                    }}
+                                    className="flex items-center gap-3 w-full px-5 py-2 text-left hover:bg-white/5 transition-colors"
+                                >
+                                    <img src={artworkUrl(song.thumbnail, 'thumb', song.artwork)} alt="" className="w-10 h-10 rounded object-cover" />
+                                    <div className="min-w-0">
+                                        <div className="text-sm font-medium text-white truncate">{song.title}</div>
+                                        <div className="text-xs text-gray-400 truncate">{song.artist}</div>
+                                    </div>
+                                </button>
+                            ))}
+                        </div>
+                    )}
                 </div>
             </div>
 
@@ -104,6 +204,9 @@ const Search = ({ onPlay, onDownload, initialQuery = '' }: SearchProps) => {
                                 />
                             ))}
                         </div>
+                        <div ref={sentinelRef} className="h-16 flex items-center justify-center">
+                            {loadingMore && <div className="w-6 h-6 border-2 border-cyan-400 border-t-transparent rounded-full animate-spin"></div>}
+                        </div>
                     </>
                 )}
             </div>
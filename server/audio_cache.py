@@ -0,0 +1,154 @@
+import asyncio
+import os
+import re
+import uuid
+from collections import OrderedDict
+
+import httpx
+
+
+class AudioCache:
+    """
+    Content-addressed on-disk audio cache.
+
+    Files are named `<song_id>_<quality>.m4a`, so a track is stored once no matter how
+    often it is played or downloaded. The total size is kept under `max_bytes` by
+    evicting least recently used files; on startup the index is rebuilt from disk,
+    oldest access time first.
+    """
+
+    def __init__(self, directory, max_bytes=2 * 1024 ** 3, chunk_size=256 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        os.makedirs(directory, exist_ok=True)
+        self._entries = OrderedDict() # filename -> size, least recently used first
+        self.total_bytes = 0
+        self._filling = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.http = httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=5.0), follow_redirects=True)
+        self._load()
+
+    def _load(self):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                # Interrupted fill from a previous run
+                os.remove(path)
+            elif os.path.isfile(path):
+                st = os.stat(path)
+                files.append((st.st_atime, name, st.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def filename(song_id, quality="320"):
+        safe_id = re.sub(r"[^A-Za-z0-9_-]", "", song_id)
+        return f"{safe_id}_{quality}.m4a"
+
+    def path(self, song_id, quality="320"):
+        return os.path.join(self.directory, self.filename(song_id, quality))
+
+    def lookup(self, song_id, quality="320"):
+        """Path of the cached file, or None. Counts as a use for LRU purposes."""
+        name = self.filename(song_id, quality)
+        if name in self._entries and os.path.exists(os.path.join(self.directory, name)):
+            self._entries.move_to_end(name)
+            self.hits += 1
+            return os.path.join(self.directory, name)
+        self._entries.pop(name, None)
+        self.misses += 1
+        return None
+
+    def add(self, path):
+        """Register a complete file that was written into the cache directory."""
+        name = os.path.basename(path)
+        size = os.path.getsize(path)
+        self.total_bytes += size - self._entries.pop(name, 0)
+        self._entries[name] = size
+        self._evict(keep=name)
+
+    def _evict(self, keep=None):
+        while self.total_bytes > self.max_bytes and self._entries:
+            name, size = next(iter(self._entries.items()))
+            if name == keep:
+                break
+            del self._entries[name]
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    async def stream_upstream(self, url, song_id, quality="320", range_header=None):
+        """
+        Open `url` and return (status, headers, body iterator).
+
+        A full request on a miss is teed into the cache while it streams to the client;
+        the file is only committed once every byte arrived. Range requests and
+        concurrent misses for a track that is already filling are proxied as-is.
+        """
+        headers = {"Range": range_header} if range_header else {}
+        resp = await self.http.send(self.http.build_request("GET", url, headers=headers), stream=True)
+        if resp.status_code >= 400:
+            await resp.aclose()
+            raise httpx.HTTPStatusError("Upstream stream failed", request=resp.request, response=resp)
+
+        out_headers = {k: resp.headers[k] for k in ("Content-Length", "Content-Range", "Accept-Ranges") if k in resp.headers}
+        name = self.filename(song_id, quality)
+        tee = resp.status_code == 200 and name not in self._filling
+        if tee:
+            self._filling.add(name)
+        return resp.status_code, out_headers, self._iter_body(resp, name if tee else None)
+
+    async def _iter_body(self, resp, name):
+        if name is None:
+            try:
+                async for chunk in resp.aiter_bytes(self.chunk_size):
+                    yield chunk
+            finally:
+                await resp.aclose()
+            return
+
+        final_path = os.path.join(self.directory, name)
+        part_path = f"{final_path}.{uuid.uuid4().hex[:8]}.part"
+        expected = resp.headers.get("Content-Length")
+        written = 0
+        complete = False
+        f = open(part_path, "wb")
+        try:
+            async for chunk in resp.aiter_bytes(self.chunk_size):
+                await asyncio.to_thread(f.write, chunk)
+                written += len(chunk)
+                yield chunk
+            complete = expected is None or written == int(expected)
+        finally:
+            f.close()
+            await resp.aclose()
+            self._filling.discard(name)
+            if complete:
+                os.replace(part_path, final_path)
+                self.add(final_path)
+            else:
+                # Client went away or upstream cut off; never cache a truncated file
+                os.remove(part_path)
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    def stats(self):
+        return {
+            "files": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "filling": len(self._filling),
+        }
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import httpx
+
+
+class DownloadManager:
+    """
+    Async download engine for /api/download.
+
+    A fixed pool of worker tasks drains a job queue, and a shared semaphore caps
+    concurrent transfers process-wide so a burst of downloads can't starve the API.
+    Bytes go to `<path>.part` through a large write buffer flushed off the event loop;
+    after a dropped connection the transfer resumes from the partial file with an
+    HTTP Range request. Progress is reported on the job dict from Content-Length.
+    """
+
+    def __init__(self, workers=4, max_transfers=4, chunk_size=256 * 1024, buffer_size=1024 * 1024, retries=3, timeout=30.0):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.buffer_size = buffer_size
+        self.retries = retries
+        # Shared with anything else that streams from the CDN
+        self.transfers = asyncio.Semaphore(max_transfers)
+        self.queue = asyncio.Queue()
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            limits=httpx.Limits(max_connections=max_transfers * 2),
+            follow_redirects=True,
+        )
+        self._tasks = []
+        self._locks = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            workers=int(os.getenv("DOWNLOAD_WORKERS", "4")),
+            max_transfers=int(os.getenv("DOWNLOAD_MAX_TRANSFERS", "4")),
+        )
+
+    def start(self):
+        # Must be called from a running event loop (app startup)
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def aclose(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.http.aclose()
+
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    async def submit(self, job, url, path, on_complete=None):
+        """
+        Queue a download of `url` to `path`, reporting status on the `job` dict.
+        `on_complete(path)` runs once the file is in place.
+        """
+        job["status"] = "queued"
+        await self.queue.put((job, url, path, on_complete))
+
+    async def _worker(self):
+        while True:
+            job, url, path, on_complete = await self.queue.get()
+            try:
+                job["status"] = "downloading"
+                await self.download(url, path, job)
+                if on_complete:
+                    on_complete(path)
+                job["status"] = "completed"
+                job["file"] = os.path.basename(path)
+                job["progress"] = 100
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = str(e)
+                print(f"Download Error: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def download(self, url, path, job=None):
+        job = job if job is not None else {}
+        # Two jobs for the same target path share one transfer: path -> [lock, users]
+        entry = self._locks.setdefault(path, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                if os.path.exists(path):
+                    return path
+                return await self._download(url, path, job)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[path]
+
+    async def _download(self, url, path, job):
+        part_path = path + ".part"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.transfers:
+                    offset = await self._transfer(url, part_path, offset, job)
+                os.replace(part_path, path)
+                return path
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+                    raise
+                if attempt == self.retries:
+                    raise
+                # Keep the partial file; the next attempt resumes from it
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                print(f"Download retry {attempt + 1} for {url} at byte {offset}: {e}")
+                await asyncio.sleep(min(2 ** attempt, 10))
+
+    async def _transfer(self, url, part_path, offset, job):
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        async with self.http.stream("GET", url, headers=headers) as resp:
+            if resp.status_code == 416:
+                # Nothing left to fetch; the partial file is already complete
+                return offset
+            resp.raise_for_status()
+            if offset and resp.status_code != 206:
+                # Server ignored the Range header, start over
+                offset = 0
+
+            length = resp.headers.get("Content-Length")
+            total = offset + int(length) if length else None
+            job["total_bytes"] = total
+            job["bytes_downloaded"] = offset
+
+            with open(part_path, "ab" if offset else "wb") as f:
+                buffer = bytearray()
+                async for chunk in resp.aiter_bytes(self.chunk_size):
+                    buffer += chunk
+                    offset += len(chunk)
+                    job["bytes_downloaded"] = offset
+                    if total:
+                        job["progress"] = min(99, offset * 100 // total)
+                    if len(buffer) >= self.buffer_size:
+                        await asyncio.to_thread(f.write, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await asyncio.to_thread(f.write, bytes(buffer))
+        return offset
@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import io
+import os
+import re
+from collections import OrderedDict
+from urllib.parse import urlencode, urlsplit
+
+import httpx
+
+# Sizes the JioSaavn CDN already serves ("...-150x150.jpg")
+NATIVE_SIZES = (50, 150, 500)
+
+# Sizes /api/image will produce; requests are rounded up to one of these so the cache stays small
+IMAGE_SIZES = (50, 150, 250, 500)
+
+# UI slot -> edge length in px (about 2x the CSS size, for high-DPI screens)
+ARTWORK_SLOTS = {"thumb": 150, "card": 250}
+
+ALLOWED_HOST_SUFFIX = ".saavncdn.com"
+
+_SIZE_IN_URL = re.compile(r"\d+x\d+(?=\.\w+$)")
+
+_image_module = False # not looked up yet
+_webp_support = None
+
+
+def _pillow():
+    # Pillow is in requirements.txt (the 250 px card size and WebP need it); if the import
+    # fails anyway, only the CDN's native sizes are served, as-is
+    global _image_module
+    if _image_module is False:
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+        _image_module = Image
+    return _image_module
+
+
+def artwork(thumbnail):
+    """Proxy paths per UI slot for a listing's thumbnail, or None if it isn't a CDN image."""
+    if not is_allowed(thumbnail):
+        return None
+    return {slot: "/api/image?" + urlencode({"size": size, "src": thumbnail}) for slot, size in ARTWORK_SLOTS.items()}
+
+
+def is_allowed(src):
+    # Only JioSaavn artwork; anything else would turn this into an open proxy
+    try:
+        parts = urlsplit(src or "")
+    except ValueError:
+        return False
+    return parts.scheme in ("http", "https") and (parts.hostname or "").endswith(ALLOWED_HOST_SUFFIX)
+
+
+def snap_size(size):
+    return next((s for s in IMAGE_SIZES if s >= size), IMAGE_SIZES[-1])
+
+
+def native_variant(src, size):
+    """The smallest native CDN rendition of `src` that is at least `size` px."""
+    native = next((n for n in NATIVE_SIZES if n >= size), NATIVE_SIZES[-1])
+    return _SIZE_IN_URL.sub(f"{native}x{native}", src), native
+
+
+class ImageCache:
+    """
+    Bounded on-disk cache of artwork variants for /api/image.
+
+    Each (source, size, format) is fetched from the CDN once - using the smallest native
+    rendition that covers the requested size - optionally resized and re-encoded as
+    WebP when Pillow is installed, and stored as `<key>.<content hash>.<ext>`. The content
+    hash doubles as a strong ETag. Least recently served files are evicted past `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 ** 2, quality=82):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.quality = quality
+        os.makedirs(directory, exist_ok=True)
+        self._entries = OrderedDict() # key -> (filename, size), least recently used first
+        self._loading = {} # key -> task, so concurrent misses share one fetch
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.http = httpx.AsyncClient(timeout=httpx.Timeout(10.0, connect=3.0), follow_redirects=True)
+        self._load()
+
+    def _load(self):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                os.remove(path)
+            elif name.count(".") == 2 and os.path.isfile(path):
+                st = os.stat(path)
+                files.append((st.st_atime, name, st.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name.split(".", 1)[0]] = (name, size)
+            self.total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def webp_supported():
+        global _webp_support
+        if _webp_support is None:
+            _webp_support = False
+            if _pillow() is not None:
+                from PIL import features
+                _webp_support = bool(features.check("webp"))
+        return _webp_support
+
+    @staticmethod
+    def key(src, size, fmt):
+        return hashlib.blake2b(f"{src}|{size}|{fmt}".encode(), digest_size=12).hexdigest()
+
+    async def get(self, src, size, webp=False):
+        """(path, etag, media type) for `src` at `size` px, fetching and storing it on a miss."""
+        fmt = "webp" if webp and self.webp_supported() else "orig"
+        key = self.key(src, size, fmt)
+        entry = self._entries.get(key)
+        if entry and os.path.exists(os.path.join(self.directory, entry[0])):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._describe(entry[0])
+
+        self.misses += 1
+        task = self._loading.get(key)
+        if task is None:
+            task = self._loading[key] = asyncio.create_task(self._fill(key, src, size, fmt))
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        return self._describe(await asyncio.shield(task))
+
+    def _describe(self, name):
+        _, digest, ext = name.split(".")
+        media_type = {"webp": "image/webp", "png": "image/png"}.get(ext, "image/jpeg")
+        return os.path.join(self.directory, name), f'"{digest}"', media_type
+
+    async def _fill(self, key, src, size, fmt):
+        url, native = native_variant(src, size)
+        resp = await self.http.get(url)
+        resp.raise_for_status()
+        data = resp.content
+        ext = (os.path.splitext(urlsplit(url).path)[1].lstrip(".") or "jpg").lower()
+
+        if (native != size or fmt == "webp") and _pillow() is not None:
+            data, ext = await asyncio.to_thread(self._transcode, data, size, fmt, ext)
+
+        digest = hashlib.blake2b(data, digest_size=12).hexdigest()
+        name = f"{key}.{digest}.{ext}"
+        path = os.path.join(self.directory, name)
+        part_path = f"{path}.part"
+        await asyncio.to_thread(self._write, part_path, path, data)
+
+        old = self._entries.pop(key, None)
+        if old:
+            self.total_bytes -= old[1]
+        self._entries[key] = (name, len(data))
+        self.total_bytes += len(data)
+        self._evict(keep=key)
+        return name
+
+    def _transcode(self, data, size, fmt, ext):
+        Image = _pillow()
+        with Image.open(io.BytesIO(data)) as img:
+            img = img.convert("RGB")
+            if img.width > size or img.height > size:
+                img.thumbnail((size, size), Image.LANCZOS)
+            out = io.BytesIO()
+            if fmt == "webp":
+                img.save(out, "WEBP", quality=self.quality, method=4)
+                return out.getvalue(), "webp"
+            img.save(out, "JPEG", quality=self.quality, optimize=True, progressive=True)
+            return out.getvalue(), "jpg"
+
+    @staticmethod
+    def _write(part_path, path, data):
+        with open(part_path, "wb") as f:
+            f.write(data)
+        os.replace(part_path, path)
+
+    def _evict(self, keep=None):
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, (name, size) = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    def stats(self):
+        return {
+            "files": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "webp": self.webp_supported(),
+        }
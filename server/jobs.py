@@ -0,0 +1,121 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+FINISHED = ("completed", "failed", "error")
+
+
+class Job(dict):
+    """
+    Job status dict that wakes up anyone waiting on it whenever a field changes,
+    so progress can be pushed instead of polled. Serializes like a plain dict.
+
+    Every change bumps `version`, so a watcher that remembers the version it last
+    sent also notices changes made while it wasn't waiting.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.touched = time.monotonic()
+        self.version = 0
+        self._waiter = None
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._notify()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._notify()
+
+    @property
+    def finished(self):
+        return self.get("status") in FINISHED
+
+    def snapshot(self):
+        """(version, copy of the fields) taken together, for a consistent event."""
+        return self.version, dict(self)
+
+    def _notify(self):
+        self.touched = time.monotonic()
+        self.version += 1
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+        self._waiter = None
+
+    async def wait_changed(self, since, timeout=None):
+        """
+        Wait until the job has changed since version `since`, returning at once if it
+        already has; raises asyncio.TimeoutError after `timeout` seconds.
+        """
+        if self.version != since:
+            return
+        if self._waiter is None:
+            self._waiter = asyncio.get_running_loop().create_future()
+        await asyncio.wait_for(asyncio.shield(self._waiter), timeout)
+
+
+class JobRegistry:
+    """
+    Download jobs by id, bounded by count and by TTL since their last update.
+
+    Evicting a job also deletes its per-job file (`<job_id>_*` in `directory`);
+    shared files such as audio cache entries are left alone.
+    """
+
+    def __init__(self, directory=None, max_jobs=1000, ttl=3600.0):
+        self.directory = directory
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self._jobs = OrderedDict()
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __contains__(self, job_id):
+        return self.get(job_id) is not None
+
+    def create(self):
+        self.prune()
+        job_id = str(uuid.uuid4())
+        # Initial status is 'queued'
+        job = Job(status="queued", progress=0, file=None, error=None)
+        self._jobs[job_id] = job
+        return job_id, job
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is not None and self._expired(job):
+            self._remove(job_id)
+            return None
+        return job
+
+    def active(self):
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def _expired(self, job, now=None):
+        return job.finished and (now or time.monotonic()) - job.touched > self.ttl
+
+    def prune(self):
+        now = time.monotonic()
+        for job_id in [j for j, job in self._jobs.items() if self._expired(job, now)]:
+            self._remove(job_id)
+
+        # Over the cap: drop the oldest finished jobs; running ones are never evicted
+        if len(self._jobs) >= self.max_jobs:
+            for job_id in [j for j, job in self._jobs.items() if job.finished]:
+                if len(self._jobs) < self.max_jobs:
+                    break
+                self._remove(job_id)
+
+    def _remove(self, job_id):
+        job = self._jobs.pop(job_id, None)
+        if not job or not self.directory or not job.get("file"):
+            return
+        if job["file"].startswith(f"{job_id}_"):
+            try:
+                os.remove(os.path.join(self.directory, job["file"]))
+            except FileNotFoundError:
+                pass
@@ -1,14 +1,14 @@
 import os
+import json
 import subprocess
-import uuid
 import shutil
 import asyncio
-import requests
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
 # Force current directory into sys.path to solve Vercel import issues
 import sys
@@ -16,9 +16,52 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.append(current_dir)
 
-from jiosaavn_client import JioSaavnClient
+from jiosaavn_client import AsyncJioSaavnClient, CAT_MAP, encode_cursor, decode_cursor
+from stations import StationRegistry
+from downloads import DownloadManager
+from audio_cache import AudioCache
+from jobs import FINISHED, JobRegistry
+from serialization import tracks_response, shelves_response, ndjson_tracks, cache_control
+from metrics import metrics, ServerTimingMiddleware
+from images import ImageCache, is_allowed, snap_size
+from prewarm import ChartPrewarmer
+from zip_export import ZipExporter, export_entries, safe_name
 
-app = FastAPI()
+# Handle Read-Only Filesystem (Vercel)
+try:
+    DOWNLOAD_DIR = os.path.join(os.getcwd(), "downloads")
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+except OSError:
+    # Fallback to /tmp for Vercel/Lambda
+    DOWNLOAD_DIR = os.path.join("/tmp", "downloads")
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+
+# Start JioSaavn client (one pooled keep-alive session for the whole process).
+# The SQLite tier next to the downloads is shared by every uvicorn worker on this host.
+jio_client = AsyncJioSaavnClient.from_env(persistent_path=os.path.join(DOWNLOAD_DIR, "cache", "jiosaavn.sqlite3"))
+
+# Radio station sessions for the infinite flow, keyed by a per-listener station id
+stations = StationRegistry(jio_client.get_recommendations)
+
+# Download engine: worker pool + global cap on concurrent transfers
+downloads = DownloadManager.from_env()
+
+# Keeps every chart category's first page warm, refreshed before it expires
+chart_prewarmer = ChartPrewarmer.from_env(jio_client, CAT_MAP)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    downloads.start()
+    chart_prewarmer.start()
+    yield
+    await chart_prewarmer.aclose()
+    await downloads.aclose()
+    await audio_cache.aclose()
+    await image_cache.aclose()
+    await zip_exporter.aclose()
+    await jio_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -26,28 +69,65 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Next-Cursor"],
 )
 
-# Handle Read-Only Filesystem (Vercel)
-try:
-    DOWNLOAD_DIR = os.path.join(os.getcwd(), "downloads")
-    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-except OSError:
-    # Fallback to /tmp for Vercel/Lambda
-    DOWNLOAD_DIR = os.path.join("/tmp", "downloads")
-    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+# Outermost, so Server-Timing covers the whole request (METRICS_ENABLED=0 disables)
+app.add_middleware(ServerTimingMiddleware, metrics=metrics)
+
+# Played/downloaded tracks, stored once per song id + quality
+audio_cache = AudioCache(
+    os.path.join(DOWNLOAD_DIR, "audio"),
+    max_bytes=int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(2 * 1024 ** 3))),
+)
+
+# Resized artwork for /api/image, next to the audio cache
+image_cache = ImageCache(
+    os.path.join(DOWNLOAD_DIR, "images"),
+    max_bytes=int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(256 * 1024 ** 2))),
+)
+
+# Bulk downloads: ZIP archives streamed straight to the client, no temp files
+zip_exporter = ZipExporter.from_env()
+
+# Store job status (bounded; finished jobs and their files expire)
+jobs = JobRegistry(
+    DOWNLOAD_DIR,
+    max_jobs=int(os.getenv("JOBS_MAX", "1000")),
+    ttl=float(os.getenv("JOBS_TTL", "3600")),
+)
 
-# Start JioSaavn client
-jio_client = JioSaavnClient()
+def _ratio(hits, misses):
+    return round(hits / (hits + misses), 4) if hits + misses else 0.0
 
-# Store job status
-jobs: Dict[str, dict] = {}
+# Scrape-time gauges for /api/metrics
+metrics.gauge("cache_hit_ratio", lambda: jio_client.cache.stats()["hit_ratio"], cache="search")
+metrics.gauge("cache_hit_ratio", lambda: jio_client.tracks.stats()["hit_ratio"], cache="tracks")
+metrics.gauge("cache_hit_ratio", lambda: _ratio(audio_cache.hits, audio_cache.misses), cache="audio")
+metrics.gauge("cache_hit_ratio", lambda: _ratio(jio_client.persistent.hits, jio_client.persistent.misses) if jio_client.persistent else None, cache="persistent")
+metrics.gauge("cache_entries", lambda: jio_client.cache.stats()["size"], cache="search")
+metrics.gauge("audio_cache_bytes", lambda: audio_cache.total_bytes)
+metrics.gauge("singleflight_in_flight", lambda: jio_client.flight.stats()["in_flight"])
+metrics.gauge("upstream_concurrency_limit", lambda: jio_client.guard.limiter.stats()["limit"])
+metrics.gauge("upstream_in_flight", lambda: jio_client.guard.limiter.in_flight)
+metrics.gauge("upstream_circuit_open", lambda: int(not jio_client.guard.healthy))
+metrics.gauge("download_queue_depth", downloads.queue_depth)
+metrics.gauge("download_jobs_active", jobs.active)
+metrics.gauge("exports_active", lambda: zip_exporter.active)
+for category in CAT_MAP:
+    metrics.gauge("chart_age_seconds", lambda category=category: chart_prewarmer.age(category), category=category)
 
 class DownloadRequest(BaseModel):
     url: str # This expects the streamUrl now
     title: str
     artist: str
     thumbnail: str
+    videoId: Optional[str] = None # Lets repeat downloads reuse the audio cache
+
+class ExportRequest(BaseModel):
+    ids: List[str] = [] # Song ids; served from the audio cache when possible
+    urls: List[str] = [] # Stream URLs (JioSaavn CDN only)
+    name: Optional[str] = None # Archive name, without ".zip"
 
 class SearchResult(BaseModel):
     title: str
@@ -56,124 +136,312 @@ class SearchResult(BaseModel):
     thumbnail: str
     videoId: str # We keep this key for frontend compat, but it holds Jio ID
     streamUrl: Optional[str] = None
+    streamToken: Optional[str] = None # Opaque; exchange for a streamUrl via /api/resolve
+    artwork: Optional[Dict[str, str]] = None # /api/image paths per UI slot ("thumb", "card")
+
+# Stream bitrate in kbps; "auto" picks from the client's `bandwidth` hint (kbps) and checks the CDN has it
+Quality = Literal["96", "160", "320", "auto"]
+
+def page_args(cursor: Optional[str], size: int):
+    # The cursor carries page and size; without one this is the first page
+    if cursor:
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return 1, max(1, min(size, 50))
+
+def paged_response(results, page: int, size: int, request: Request, cache: str):
+    # The body stays a plain list; the next page is advertised in a header (absent on the last page)
+    response = tracks_response(results, request, cache)
+    if len(results) >= size:
+        response.headers["X-Next-Cursor"] = encode_cursor(page + 1, size)
+    return response
+
+def ndjson_response(tracks, page: int, size: int, cache: str):
+    next_cursor = lambda count: encode_cursor(page + 1, size) if count >= size else None
+    return StreamingResponse(ndjson_tracks(tracks, next_cursor), media_type="application/x-ndjson", headers={"Cache-Control": cache})
+
+# Per-route Cache-Control. Browsers revalidate quickly (a 304 against the ETag); the edge
+# keeps listings as long as our own cache does and serves them stale while it refetches.
+def charts_cache():
+    return cache_control(60, jio_client.chart_ttl, jio_client.cache.stale_ttl)
+
+def search_cache():
+    return cache_control(30, jio_client.search_ttl, 600)
+
+SUGGEST_CACHE = "public, max-age=30, s-maxage=60"
+RECOMMENDATIONS_CACHE = "private, max-age=60" # Per listener; never shared
+QUEUE_CACHE = "no-store" # Every call advances the station
+
+@app.get("/api/health")
+async def health_check():
+    # "degraded" while the upstream circuit is open: cached listings only, new lookups fail fast
+    upstream = jio_client.guard.stats()
+    return {"status": "ok" if upstream["healthy"] else "degraded", "upstream": upstream}
 
 @app.get("/api/search", response_model=List[SearchResult])
-async def search_music(query: str):
+async def search_music(request: Request, query: str, cursor: Optional[str] = None, size: int = 20, format: str = "json"):
+    # format=ndjson streams one track per line, ending with {"nextCursor": ...}
+    page, size = page_args(cursor, size)
+    if format == "ndjson":
+        return ndjson_response(jio_client.stream_search(query, page, size, prefetch=True), page, size, search_cache())
     try:
-        results = jio_client.search_songs(query)
-        serialized_results = []
-        
-        for r in results:
-            serialized_results.append(SearchResult(
-                title=r.get('title', 'Unknown'),
-                artist=r.get('artist', ''),
-                album=r.get('album', ''),
-                thumbnail=r.get('thumbnail', ''),
-                videoId=r.get('id'), # Compat
-                streamUrl=r.get('streamUrl')
-            ))
-            
-        return serialized_results
+        results = await jio_client.search_songs(query, page, size, prefetch=True)
+        return paged_response(results, page, size, request, search_cache())
     except Exception as e:
         print(f"Search Error: {e}")
         raise HTTPException(status_code=500, detail="Search failed")
 
+@app.get("/api/suggest", response_model=List[SearchResult])
+async def suggest(request: Request, q: str, limit: int = 8):
+    # Typeahead from tracks this process has already seen; no upstream round-trip
+    return tracks_response(jio_client.suggest(q, max(1, min(limit, 20))), request, SUGGEST_CACHE)
+
 @app.get("/api/recommendations/{song_id}", response_model=List[SearchResult])
-async def get_recommendations(song_id: str):
+async def get_recommendations(song_id: str, request: Request):
     try:
-        results = jio_client.get_recommendations(song_id)
-        serialized_results = []
-        
-        for r in results:
-            serialized_results.append(SearchResult(
-                title=r.get('title', 'Unknown'),
-                artist=r.get('artist', ''),
-                album=r.get('album', ''),
-                thumbnail=r.get('thumbnail', ''),
-                videoId=r.get('id'), 
-                streamUrl=r.get('streamUrl')
-            ))
-            
-        return serialized_results
+        results = await jio_client.get_recommendations(song_id)
+        return tracks_response(results, request, RECOMMENDATIONS_CACHE)
     except Exception as e:
         print(f"Rec Error: {e}")
         return []
 
+@app.post("/api/stations/{song_id}")
+async def create_station(song_id: str):
+    # Every listener gets their own station, even from the same seed; its queue starts filling now
+    return {"station_id": stations.create(song_id), "seed": song_id}
+
+@app.get("/api/stations/{station_id}/next", response_model=List[SearchResult])
+async def station_next(station_id: str, n: int = 1):
+    # Next tracks for the station, served from a buffer refilled in the background
+    station = stations.get(station_id)
+    if station is None:
+        raise HTTPException(status_code=404, detail="Station not found or expired")
+    try:
+        results = await station.take(max(1, min(n, 20)))
+        return tracks_response(results, cache=QUEUE_CACHE)
+    except Exception as e:
+        print(f"Queue Error: {e}")
+        return []
+
+@app.get("/api/songs", response_model=List[SearchResult])
+async def get_songs(ids: str, quality: Quality = "320", bandwidth: Optional[float] = None):
+    # Batch hydration (e.g. the Library): fresh metadata and stream URLs for many ids at once
+    song_ids = [i for i in ids.split(",") if i][:500]
+    try:
+        results = await jio_client.get_songs(song_ids, quality=quality, bandwidth=bandwidth)
+        return tracks_response(results)
+    except Exception as e:
+        print(f"Songs Error: {e}")
+        raise HTTPException(status_code=500, detail="Song lookup failed")
+
+@app.get("/api/resolve")
+async def resolve_streams(ids: str, quality: Quality = "320", bandwidth: Optional[float] = None):
+    # Batched: ?ids=a,b,c -> {"a": url, "b": url, ...}
+    song_ids = [i for i in ids.split(",") if i][:100]
+    return await jio_client.resolve_stream_urls(song_ids, quality=quality, bandwidth=bandwidth)
+
+@app.get("/api/resolve/{song_id}")
+async def resolve_stream(song_id: str, token: Optional[str] = None, quality: Quality = "320", bandwidth: Optional[float] = None):
+    # The listing's streamToken can be passed back to skip the id lookup
+    stream_url = jio_client.decrypt_url(token) if token else None
+    if stream_url:
+        stream_url = (await jio_client.select_quality({song_id: stream_url}, quality, bandwidth))[song_id]
+    else:
+        stream_url = (await jio_client.resolve_stream_urls([song_id], quality=quality, bandwidth=bandwidth)).get(song_id)
+    if not stream_url:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return {"id": song_id, "streamUrl": stream_url}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return jio_client.stats()
+
+@app.get("/api/metrics")
+async def get_metrics():
+    # Prometheus text format
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.post("/api/download")
-async def start_download(request: DownloadRequest, background_tasks: BackgroundTasks):
-    job_id = str(uuid.uuid4())
-    # Initial status is 'queued'
-    jobs[job_id] = {"status": "queued", "progress": 0, "file": None, "error": None}
-    
-    background_tasks.add_task(run_direct_download, job_id, request)
-    
+async def start_download(request: DownloadRequest):
+    job_id, job = jobs.create()
+    # Save-as name for /api/files; the stored file is named by job or song id
+    job["name"] = safe_name(f"{request.artist} - {request.title}" if request.artist else request.title)
+
+    # Direct download from streamUrl
+    if not request.url:
+        job.update(status="failed", error="No stream URL provided")
+        return {"job_id": job_id}
+
+    if request.videoId:
+        # Content-addressed: a track already in the audio cache is never fetched again
+        quality = jio_client.stream_quality(request.url) or "320"
+        cached = audio_cache.lookup(request.videoId, quality)
+        if cached:
+            job.update(status="completed", progress=100, file=os.path.basename(cached))
+        else:
+            await downloads.submit(job, request.url, audio_cache.path(request.videoId, quality), on_complete=audio_cache.add)
+        return {"job_id": job_id}
+
+    # Sanitize filename
+    safe_title = "".join([c for c in request.title if c.isalpha() or c.isdigit() or c==' ']).strip()
+    filename = f"{safe_title}.mp3" # It's mp4/aac usually but we name it mp3 or m4a
+    final_path = os.path.join(DOWNLOAD_DIR, f"{job_id}_{filename}")
+
+    await downloads.submit(job, request.url, final_path)
+
     return {"job_id": job_id}
 
+async def export_response(ids, urls, name):
+    # One archive instead of a job, a poll and a temp file per track
+    entries = await export_entries(jio_client, audio_cache, ids, urls)
+    if not entries:
+        raise HTTPException(status_code=404, detail="Nothing to export")
+    filename = safe_name(name, "legeztify-export")
+    return StreamingResponse(
+        zip_exporter.stream(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.zip"', "Cache-Control": "no-store"},
+    )
+
+@app.get("/api/export")
+async def export_zip(ids: str, name: Optional[str] = None):
+    # GET so a plain link can start it: the browser saves the stream to disk as it arrives
+    return await export_response(ids.split(","), [], name)
+
+@app.post("/api/export")
+async def export_zip_batch(request: ExportRequest):
+    return await export_response(request.ids, request.urls, request.name)
+
 @app.get("/api/status/{job_id}")
 async def get_status(job_id: str):
-    if job_id not in jobs:
+    job = jobs.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    return jobs[job_id]
+    return job
+
+@app.get("/api/events/{job_id}")
+async def job_events(job_id: str):
+    # Server-Sent Events: pushes job progress until it finishes, instead of clients polling /api/status
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        while True:
+            # End on the snapshot that was sent, so the final status is always delivered
+            version, snapshot = job.snapshot()
+            yield f"event: progress\ndata: {json.dumps(snapshot)}\n\n"
+            if snapshot["status"] in FINISHED:
+                return
+            try:
+                await job.wait_changed(version, timeout=15)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+            # Coalesce bursts of per-chunk progress into at most a few events per second
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def download_name(filename, job_id=None):
+    # "Artist - Title.m4a" from the job that produced the file, else from the track store
+    stem, ext = os.path.splitext(filename)
+    job = jobs.get(job_id or stem.split("_", 1)[0])
+    if job is not None and job.get("file") == filename and job.get("name"):
+        return job["name"] + ext
+    # Audio cache files are "<song id>_<quality>"
+    track = jio_client.tracks.get(stem.rsplit("_", 1)[0])
+    if track is not None:
+        return safe_name(f"{track.artist} - {track.title}" if track.artist else track.title, stem) + ext
+    return filename
 
 @app.get("/api/files/{filename}")
-async def get_file(filename: str):
+async def get_file(filename: str, job: Optional[str] = None):
     file_path = os.path.join(DOWNLOAD_DIR, filename)
-    if not os.path.exists(file_path):
+    if not os.path.isfile(file_path):
+        file_path = os.path.join(audio_cache.directory, filename)
+    if not os.path.isfile(file_path):
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(file_path)
+    return FileResponse(file_path, filename=download_name(filename, job))
+
+@app.get("/api/stream/{song_id}")
+async def stream_song(song_id: str, request: Request, quality: Quality = "320", bandwidth: Optional[float] = None):
+    # Cached: Range-aware FileResponse (zero-copy where the ASGI server supports pathsend)
+    cached = audio_cache.lookup(song_id, quality) if quality != "auto" else None
+    if cached:
+        return FileResponse(cached, media_type="audio/mp4")
+
+    stream_url = (await jio_client.resolve_stream_urls([song_id], quality=quality, bandwidth=bandwidth)).get(song_id)
+    if not stream_url:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    if quality == "auto":
+        # Now that we know which rendition it is, the cache may already have it
+        quality = jio_client.stream_quality(stream_url) or "320"
+        cached = audio_cache.lookup(song_id, quality)
+        if cached:
+            return FileResponse(cached, media_type="audio/mp4")
+
+    # "bytes=0-" is the whole file, so it can still be teed into the cache
+    range_header = request.headers.get("range")
+    if range_header and range_header.replace(" ", "") == "bytes=0-":
+        range_header = None
+    try:
+        status, headers, body = await audio_cache.stream_upstream(stream_url, song_id, quality, range_header=range_header)
+    except Exception as e:
+        print(f"Stream Error: {e}")
+        raise HTTPException(status_code=502, detail="Upstream stream failed")
+    return StreamingResponse(body, status_code=status, headers=headers, media_type="audio/mp4")
+
+@app.get("/api/image")
+async def get_image(src: str, request: Request, size: int = 150):
+    # Artwork proxy: one CDN fetch per variant, then served from disk with a content-hash ETag
+    if not is_allowed(src):
+        raise HTTPException(status_code=400, detail="Unsupported image source")
+    webp = "image/webp" in request.headers.get("accept", "")
+    try:
+        path, etag, media_type = await image_cache.get(src, snap_size(size), webp=webp)
+    except Exception as e:
+        print(f"Image Error: {e}")
+        raise HTTPException(status_code=502, detail="Image fetch failed")
+    # Variants of a URL never change, so browsers and CDNs may keep them for good
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable", "Vary": "Accept"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+@app.get("/api/image-cache/stats")
+async def image_cache_stats():
+    return image_cache.stats()
+
+@app.get("/api/audio-cache/stats")
+async def audio_cache_stats():
+    return audio_cache.stats()
+
+@app.get("/api/charts/freshness")
+async def charts_freshness():
+    # Per category: seconds since the pre-warmer last refreshed it, failures, next refresh
+    return chart_prewarmer.freshness()
 
-async def run_direct_download(job_id: str, request: DownloadRequest):
-    jobs[job_id]["status"] = "downloading"
-    
+@app.get("/api/charts/batch")
+async def get_chart_shelves(request: Request, categories: Optional[str] = None, size: int = 20):
+    # Several shelves in one round trip, fetched concurrently; each track appears on one shelf only
+    names = [c for c in (categories or "").split(",") if c][:12] or None
     try:
-        # Direct download from streamUrl
-        stream_url = request.url
-        if not stream_url:
-            raise Exception("No stream URL provided")
-
-        # Sanitize filename
-        safe_title = "".join([c for c in request.title if c.isalpha() or c.isdigit() or c==' ']).strip()
-        filename = f"{safe_title}.mp3" # It's mp4/aac usually but we name it mp3 or m4a
-        # Better to check ext from url
-        # ext = "m4a" if ".m4a" in stream_url else "mp3"
-        # Just force mp3 naming usually works for players, but let's be technically correct or just use .m4a
-        final_filename = f"{job_id}_{filename}"
-        final_path = os.path.join(DOWNLOAD_DIR, final_filename)
-
-        # Download stream
-        response = requests.get(stream_url, stream=True)
-        response.raise_for_status()
-        
-        with open(final_path, 'wb') as f:
-             for chunk in response.iter_content(chunk_size=8192):
-                 f.write(chunk)
-        
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["file"] = final_filename
-        jobs[job_id]["progress"] = 100
-        
+        shelves = await jio_client.get_chart_shelves(names, max(1, min(size, 50)))
+        return shelves_response(shelves, request, charts_cache())
     except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
-        print(f"Download Error: {e}")
+        print(f"Charts Batch Error: {e}")
+        return {"shelves": []}
 
 @app.get("/api/charts", response_model=List[SearchResult])
-async def get_charts(category: str = "all"):
+async def get_charts(request: Request, category: str = "all", cursor: Optional[str] = None, size: int = 20, format: str = "json"):
+    page, size = page_args(cursor, size)
+    if format == "ndjson":
+        return ndjson_response(jio_client.stream_charts(category, page, size, prefetch=True), page, size, charts_cache())
     try:
-        results = jio_client.get_charts(category)
-        serialized_results = []
-        
-        for r in results:
-            serialized_results.append(SearchResult(
-                title=r.get('title', 'Unknown'),
-                artist=r.get('artist', ''),
-                album=r.get('album', ''),
-                thumbnail=r.get('thumbnail', ''),
-                videoId=r.get('id'), # Compat
-                streamUrl=r.get('streamUrl')
-            ))
-            
-        return serialized_results
+        results = await jio_client.get_charts(category, page, size, prefetch=True)
+        return paged_response(results, page, size, request, charts_cache())
     except Exception as e:
         print(f"Charts Error: {e}")
         return []
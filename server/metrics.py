@@ -0,0 +1,203 @@
+import bisect
+import contextvars
+import os
+import time
+from contextlib import nullcontext
+
+# Seconds; tuned for upstream calls (tens to hundreds of ms) and sub-ms local work alike
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-request Server-Timing entries, set by ServerTimingMiddleware
+_timings = contextvars.ContextVar("server_timings", default=None)
+
+_NOOP = nullcontext()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "timing", "started")
+
+    def __init__(self, metrics, name, labels, timing):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.timing = timing
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.metrics.observe(self.name, elapsed, **self.labels)
+        if self.timing:
+            timings = _timings.get()
+            if timings is not None:
+                timings[self.timing] = timings.get(self.timing, 0.0) + elapsed
+        return False
+
+
+class Metrics:
+    """
+    In-process Prometheus metrics: histograms, counters and scrape-time gauges.
+
+    `timer()` records a duration into a histogram and, when a request is being
+    served behind ServerTimingMiddleware, adds it to that response's Server-Timing
+    header. With `enabled=False` every call returns immediately, so the hot paths
+    can stay instrumented unconditionally.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.help = {}
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+
+    @classmethod
+    def from_env(cls):
+        # METRICS_ENABLED=0 turns instrumentation into no-ops
+        return cls(enabled=os.getenv("METRICS_ENABLED", "1") != "0")
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(labels.items()))
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = Histogram()
+        hist.observe(value)
+
+    def timer(self, name, timing=None, **labels):
+        """Context manager timing a block into histogram `name` (and Server-Timing entry `timing`)."""
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, name, labels, timing)
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(labels.items()))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def gauge(self, name, fn, **labels):
+        """Register `fn()` to be read at scrape time (queue depths, cache ratios, ...)."""
+        self.gauges[(name, tuple(labels.items()))] = fn
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name in described:
+                return
+            described.add(name)
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), hist in sorted(self.histograms.items()):
+            header(name, "histogram")
+            labels = dict(labels)
+            cumulative = 0
+            for bound, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': repr(bound)})} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {hist.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+
+        for (name, labels), value in sorted(self.counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(dict(labels))} {value}")
+
+        for (name, labels), fn in sorted(self.gauges.items(), key=lambda item: item[0]):
+            try:
+                value = fn()
+            except Exception as e:
+                print(f"Metrics Error: {name}: {e}")
+                continue
+            if value is None:
+                continue
+            header(name, "gauge")
+            lines.append(f"{name}{_format_labels(dict(labels))} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware adding a Server-Timing header (e.g. `upstream;dur=84.2, serialize;dur=0.4,
+    total;dur=86.0`) to every HTTP response and recording request latency per route.
+    """
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total = time.perf_counter() - started
+                entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+                entries.append(f"total;dur={total * 1000:.2f}")
+                message["headers"] = [*message.get("headers", []), (b"server-timing", ", ".join(entries).encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            # Route templates, not raw paths, so ids don't explode label cardinality
+            route = scope.get("route")
+            self.metrics.observe(
+                "http_request_seconds",
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            )
+
+
+metrics = Metrics.from_env()
+metrics.describe("http_request_seconds", "Time to serve a request, by route template.")
+metrics.describe("jiosaavn_upstream_seconds", "JioSaavn API call latency, by __call.")
+metrics.describe("jiosaavn_upstream_errors_total", "Failed JioSaavn API calls, by __call.")
+metrics.describe("jiosaavn_decrypt_seconds", "Stream URL decryption time (memoized hits included).")
+metrics.describe("serialize_seconds", "Time to encode track listings to JSON.")
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import random
+import time
+
+
+class ChartPrewarmer:
+    """
+    Background refresh of the first page of every chart category, so /api/charts
+    is answered from a warm cache instead of making the first visitor after each
+    expiry wait on upstream.
+
+    Each category is refreshed every `interval` seconds (jittered by +/- `jitter` so
+    the categories don't all hit upstream together), which defaults to 80% of the
+    chart TTL: entries are replaced before they go stale. At most `concurrency`
+    refreshes run at once. A failed refresh is retried with exponential backoff from
+    `retry_base` seconds, capped at the regular interval. While the upstream circuit
+    is open nothing is attempted until it is due to close; then a single refresh is
+    the half-open probe, and the other due categories follow as soon as it succeeds.
+    """
+
+    def __init__(self, client, categories, interval=None, jitter=0.1, concurrency=2, retry_base=15.0, size=20):
+        self.client = client
+        self.categories = list(categories)
+        self.interval = interval or client.chart_ttl * 0.8
+        self.jitter = jitter
+        self.retry_base = retry_base
+        self.size = size # Page size the Home page asks for
+        self._slots = asyncio.Semaphore(concurrency)
+        self._state = {
+            category: {"refreshed_at": None, "failures": 0, "last_error": None, "tracks": 0, "due": 0.0}
+            for category in self.categories
+        }
+        self._task = None
+        self.refreshes = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls, client, categories):
+        # CHART_PREWARM_INTERVAL=0 (the default) means "derive from the chart TTL"
+        return cls(
+            client,
+            categories,
+            interval=float(os.getenv("CHART_PREWARM_INTERVAL", "0")),
+            concurrency=int(os.getenv("CHART_PREWARM_CONCURRENCY", "2")),
+        )
+
+    def start(self):
+        # Must be called from a running event loop (app startup)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _jittered(self, delay):
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            due = [c for c in self.categories if self._state[c]["due"] <= now]
+            guard = self.client.guard
+            if due and not guard.healthy and guard.breaker.stats()["retry_in"] == 0:
+                # The reset timeout is over: one refresh goes through as the half-open probe
+                await self._refresh(due.pop(0))
+            if due and not guard.healthy:
+                # The rest wait until the circuit may have closed
+                now = time.monotonic()
+                retry_in = max(self.retry_base, guard.breaker.stats()["retry_in"])
+                for category in due:
+                    self._state[category]["due"] = now + self._jittered(retry_in)
+            elif due:
+                await asyncio.gather(*(self._refresh(category) for category in due))
+            next_due = min(state["due"] for state in self._state.values())
+            await asyncio.sleep(max(0.5, next_due - time.monotonic()))
+
+    async def _refresh(self, category):
+        state = self._state[category]
+        async with self._slots:
+            try:
+                tracks = await self.client.refresh_chart(category, 1, self.size)
+                if not tracks:
+                    raise ValueError("empty listing")
+            except Exception as e:
+                print(f"Chart Prewarm Error ({category}): {e}")
+                self.errors += 1
+                state["failures"] += 1
+                state["last_error"] = str(e) or type(e).__name__
+                delay = min(self.interval, self.retry_base * 2 ** (state["failures"] - 1))
+            else:
+                self.refreshes += 1
+                state.update(refreshed_at=time.monotonic(), failures=0, last_error=None, tracks=len(tracks))
+                delay = self.interval
+        state["due"] = time.monotonic() + self._jittered(delay)
+
+    def age(self, category):
+        """Seconds since `category` was last refreshed, or None if it never was."""
+        refreshed_at = self._state[category]["refreshed_at"]
+        return round(time.monotonic() - refreshed_at, 1) if refreshed_at is not None else None
+
+    def freshness(self):
+        now = time.monotonic()
+        categories = {}
+        for category, state in self._state.items():
+            age = self.age(category)
+            categories[category] = {
+                "age": age,
+                "fresh": age is not None and age < self.client.chart_ttl,
+                "tracks": state["tracks"],
+                "failures": state["failures"],
+                "last_error": state["last_error"],
+                "next_refresh_in": round(max(0.0, state["due"] - now), 1),
+            }
+        return {
+            "interval": self.interval,
+            "chart_ttl": self.client.chart_ttl,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "categories": categories,
+        }
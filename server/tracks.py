@@ -0,0 +1,91 @@
+import sys
+from collections import OrderedDict
+
+
+def _intern(value):
+    # Artists, albums and album art repeat across thousands of tracks; keep one copy of each
+    return sys.intern(value) if value else value
+
+
+class Track:
+    """Compact record for one song; `token` is the encrypted media URL."""
+
+    __slots__ = ("id", "title", "artist", "album", "thumbnail", "token")
+
+    def __init__(self, id, title, artist, album, thumbnail, token):
+        self.id = id
+        self.title = title
+        self.artist = _intern(artist)
+        self.album = _intern(album)
+        self.thumbnail = _intern(thumbnail)
+        self.token = token
+
+    @classmethod
+    def from_song(cls, song):
+        # `song` is a normalize_song() dict
+        return cls(song.get("id"), song.get("title"), song.get("artist"), song.get("album"), song.get("thumbnail"), song.get("streamToken"))
+
+    def to_song(self):
+        """Back to the normalize_song() shape used by listings."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "artist": self.artist,
+            "album": self.album,
+            "thumbnail": self.thumbnail,
+            "streamUrl": None,
+            "streamToken": self.token,
+            "videoId": self.id,
+        }
+
+
+class TrackStore:
+    """
+    Process-wide song id -> Track map, fed by every listing the client normalizes.
+
+    Lets song details and stream tokens be answered from memory for anything that
+    was listed recently. Bounded to `max_tracks`, least recently written first out.
+    """
+
+    def __init__(self, max_tracks=50000):
+        self.max_tracks = max_tracks
+        self._tracks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def put(self, song):
+        """Store a normalize_song() dict and return its Track."""
+        song_id = song.get("id")
+        if not song_id:
+            return None
+        track = self._tracks.get(song_id)
+        if track is None or track.title != song.get("title") or track.token != song.get("streamToken"):
+            track = self._tracks[song_id] = Track.from_song(song)
+        self._tracks.move_to_end(song_id)
+        while len(self._tracks) > self.max_tracks:
+            self._tracks.popitem(last=False)
+            self.evictions += 1
+        return track
+
+    def get(self, song_id):
+        track = self._tracks.get(song_id)
+        if track is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return track
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._tracks),
+            "max_size": self.max_tracks,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
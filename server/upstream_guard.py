@@ -0,0 +1,195 @@
+import asyncio
+import json
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import httpx
+
+
+class UpstreamUnavailable(Exception):
+    """Raised without calling upstream: the circuit is open or too many calls are queued."""
+
+
+def is_overload(exc):
+    # Signs that upstream is struggling, as opposed to a bad request on our side
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TransportError, json.JSONDecodeError))
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for upstream calls.
+
+    Every fast, successful call raises the limit by 1/limit (about +1 per round of
+    calls); a failure or a call slower than `latency_target` halves it, at most once
+    per `latency_target` seconds so one burst of timeouts doesn't collapse it to the
+    floor. Callers over the limit wait in FIFO order; past `max_queue` waiters new
+    calls are rejected instead of piling up.
+    """
+
+    def __init__(self, initial=16, min_limit=2, max_limit=200, latency_target=2.0, backoff=0.5, max_queue=500):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.rejected = 0
+        self._waiters = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise UpstreamUnavailable("too many queued upstream calls")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # _wake() counts the slot as ours before resolving the future
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self, latency=None, overloaded=False):
+        """Free a slot; `latency` (seconds) and `overloaded` feed the limit unless None."""
+        self.in_flight -= 1
+        if latency is not None:
+            now = time.monotonic()
+            if overloaded or latency > self.latency_target:
+                if now - self._last_decrease > self.latency_target:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self):
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive overload failures and rejects calls
+    for `reset_timeout` seconds. Then a single probe call is let through
+    ("half_open"): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+
+    def allow(self):
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record(self, ok):
+        self._probing = False
+        if ok:
+            self.failures = 0
+            self.state = "closed"
+            return
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def abandon(self):
+        # The call was cancelled before it told us anything; let the next one probe
+        self._probing = False
+
+    def stats(self):
+        retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)) if self.state == "open" else 0.0
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "retry_in": round(retry_in, 1),
+        }
+
+
+class UpstreamGuard:
+    """Circuit breaker + adaptive limiter around every upstream call (`async with guard.slot():`)."""
+
+    def __init__(self, limiter=None, breaker=None):
+        self.limiter = limiter or AdaptiveLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.rejected = 0
+
+    @property
+    def healthy(self):
+        return self.breaker.state == "closed"
+
+    @asynccontextmanager
+    async def slot(self):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise UpstreamUnavailable("upstream circuit open")
+        try:
+            await self.limiter.acquire()
+        except BaseException:
+            self.breaker.abandon()
+            raise
+
+        started = time.monotonic()
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.limiter.release()
+            self.breaker.abandon()
+            raise
+        except Exception as e:
+            overloaded = is_overload(e)
+            self.limiter.release(time.monotonic() - started, overloaded)
+            # Only overload counts against the circuit; a 404 says nothing about upstream health
+            self.breaker.record(not overloaded)
+            raise
+        else:
+            self.limiter.release(time.monotonic() - started)
+            self.breaker.record(True)
+
+    def stats(self):
+        return {
+            "healthy": self.healthy,
+            "circuit": self.breaker.stats(),
+            "limiter": self.limiter.stats(),
+            "rejected": self.rejected + self.limiter.rejected,
+        }
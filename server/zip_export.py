@@ -0,0 +1,172 @@
+import asyncio
+import os
+import re
+import time
+import zipfile
+
+import httpx
+
+from images import is_allowed
+
+MAX_EXPORT_TRACKS = 500
+
+
+class _Sink:
+    """Write-only file object for ZipFile; it has no tell/seek, so zipfile streams (data descriptors)."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _reason(exc):
+    return (str(exc).splitlines() or [type(exc).__name__])[0]
+
+
+def safe_name(name, fallback="track"):
+    # Archive member names: no path separators or control characters, bounded length
+    name = re.sub(r'[\x00-\x1f/\\:*?"<>|]+', " ", name or "").strip(" .")
+    return name[:120] or fallback
+
+
+async def export_entries(client, audio_cache, song_ids=(), urls=()):
+    """
+    [(archive name, source)] for an export: tracks already in the audio cache are read
+    from disk, the rest are resolved to 320 kbps CDN URLs in one batch. Raw `urls`
+    are only accepted for the JioSaavn CDN.
+    """
+    song_ids = list(dict.fromkeys(i for i in song_ids if i))[:MAX_EXPORT_TRACKS]
+    sources = {song_id: audio_cache.lookup(song_id) for song_id in song_ids}
+    missing = [i for i, path in sources.items() if path is None]
+    if missing:
+        sources.update(await client.resolve_stream_urls(missing))
+
+    taken = {}
+
+    def unique(stem):
+        taken[stem] = taken.get(stem, 0) + 1
+        return f"{stem}.m4a" if taken[stem] == 1 else f"{stem} ({taken[stem]}).m4a"
+
+    entries = []
+    for song_id in song_ids:
+        if not sources.get(song_id):
+            continue
+        # Resolving put every track in the store, so there is a title to name it by
+        track = client.tracks.get(song_id)
+        stem = f"{track.artist} - {track.title}" if track and track.artist else (track and track.title)
+        entries.append((unique(safe_name(stem, song_id)), sources[song_id]))
+    for url in [u for u in urls if is_allowed(u)][:MAX_EXPORT_TRACKS - len(entries)]:
+        stem = os.path.splitext(os.path.basename(url.split("?", 1)[0]))[0]
+        entries.append((unique(safe_name(stem)), url))
+    return entries
+
+
+class ZipExporter:
+    """
+    Streams many tracks to the client as one ZIP archive, without temp files.
+
+    Entries are written in order straight into the response through zipfile on an
+    unseekable sink: sizes and CRCs follow each entry in a data descriptor and every
+    entry is ZIP64, so nothing is ever rewound. While one entry streams, the next
+    `concurrency - 1` are already downloading into bounded chunk queues, so memory
+    stays at about concurrency * queue_chunks * chunk_size however large the export.
+    Audio is already compressed, so entries are stored, not deflated.
+
+    A track that fails before its first byte is left out; one that fails midway is
+    kept truncated. Either way it is listed in a final `export-errors.txt`.
+    """
+
+    def __init__(self, concurrency=3, chunk_size=64 * 1024, queue_chunks=16, timeout=30.0):
+        self.concurrency = max(1, concurrency)
+        self.chunk_size = chunk_size
+        self.queue_chunks = queue_chunks
+        self.http = httpx.AsyncClient(timeout=httpx.Timeout(timeout, connect=5.0), follow_redirects=True)
+        self.active = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(concurrency=int(os.getenv("EXPORT_CONCURRENCY", "3")))
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def _read(self, source):
+        # `source` is a file in the audio cache or a CDN URL
+        if not source.startswith(("http://", "https://")):
+            with open(source, "rb") as f:
+                while chunk := await asyncio.to_thread(f.read, self.chunk_size):
+                    yield chunk
+            return
+        async with self.http.stream("GET", source) as resp:
+            resp.raise_for_status()
+            async for chunk in resp.aiter_bytes(self.chunk_size):
+                yield chunk
+
+    async def _produce(self, source, queue):
+        try:
+            async for chunk in self._read(source):
+                await queue.put(chunk)
+            await queue.put(None)
+        except Exception as e:
+            await queue.put(e)
+
+    async def stream(self, entries):
+        """Async iterator over the bytes of a ZIP of `entries`, [(archive name, source)]."""
+        self.active += 1
+        queues = [asyncio.Queue(self.queue_chunks) for _ in entries]
+        tasks = []
+
+        def start_through(index):
+            # Keep the current entry and the next `concurrency - 1` downloading
+            while len(tasks) < min(index + self.concurrency, len(entries)):
+                i = len(tasks)
+                tasks.append(asyncio.create_task(self._produce(entries[i][1], queues[i])))
+
+        sink = _Sink()
+        errors = []
+        try:
+            with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+                for index, (name, _) in enumerate(entries):
+                    start_through(index)
+                    queue = queues[index]
+                    item = await queue.get()
+                    if isinstance(item, Exception):
+                        print(f"Export Error ({name}): {item}")
+                        errors.append(f"{name}: skipped ({_reason(item)})")
+                        continue
+
+                    info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                    info.compress_type = zipfile.ZIP_STORED
+                    with archive.open(info, "w", force_zip64=True) as entry:
+                        while item is not None:
+                            if isinstance(item, Exception):
+                                print(f"Export Error ({name}): {item}")
+                                errors.append(f"{name}: incomplete ({_reason(item)})")
+                                break
+                            entry.write(item)
+                            if data := sink.drain():
+                                yield data
+                            item = await queue.get()
+                    if data := sink.drain():
+                        yield data
+
+                if errors:
+                    archive.writestr("export-errors.txt", "\n".join(errors) + "\n")
+            yield sink.drain()
+        finally:
+            # Also runs when the client disconnects mid-export
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.active -= 1
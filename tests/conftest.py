@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Backend modules import each other as siblings (server/ is the working directory in production)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(ROOT, "server"), os.path.join(ROOT, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
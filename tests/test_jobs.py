@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from jobs import JobRegistry
+
+
+def test_change_without_a_waiter_is_not_missed():
+    async def run():
+        _, job = JobRegistry().create()
+        version, _ = job.snapshot()
+        # Nobody is waiting yet when the job moves on
+        job.update(status="completed", progress=100)
+        await job.wait_changed(version, timeout=0.1)
+        return job.snapshot()
+
+    version, snapshot = asyncio.run(run())
+    assert version > 0 and snapshot["status"] == "completed"
+
+
+def test_wait_changed_times_out_without_changes():
+    async def run():
+        _, job = JobRegistry().create()
+        await job.wait_changed(job.version, timeout=0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+
+
+def test_wait_changed_wakes_on_update():
+    async def run():
+        _, job = JobRegistry().create()
+        waiting = asyncio.create_task(job.wait_changed(job.version, timeout=1))
+        await asyncio.sleep(0)
+        job["progress"] = 50
+        await waiting
+        return job["progress"]
+
+    assert asyncio.run(run()) == 50
@@ -0,0 +1,40 @@
+import asyncio
+
+from prewarm import ChartPrewarmer
+from upstream_guard import CircuitBreaker, UpstreamGuard
+
+
+class StubClient:
+    chart_ttl = 3600
+
+    def __init__(self, guard):
+        self.guard = guard
+        self.calls = []
+
+    async def refresh_chart(self, category, page, size):
+        async with self.guard.slot():
+            self.calls.append(category)
+            return [{"id": f"{category}-{page}"}]
+
+
+def test_prewarm_probes_and_recovers_after_the_circuit_opens():
+    async def run():
+        guard = UpstreamGuard(breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.2))
+        guard.breaker.record(False)
+        client = StubClient(guard)
+        prewarmer = ChartPrewarmer(client, ["all", "trending", "pop"], interval=3600, retry_base=0.1)
+        prewarmer.start()
+        try:
+            for _ in range(40):
+                await asyncio.sleep(0.1)
+                if len(client.calls) == 3:
+                    break
+        finally:
+            await prewarmer.aclose()
+        return guard, client, prewarmer
+
+    guard, client, prewarmer = asyncio.run(run())
+    # The first refresh after the reset timeout was the half-open probe; it closed the circuit
+    assert guard.healthy
+    assert sorted(client.calls) == ["all", "pop", "trending"]
+    assert all(c["age"] is not None for c in prewarmer.freshness()["categories"].values())
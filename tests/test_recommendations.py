@@ -0,0 +1,57 @@
+import asyncio
+
+from fake_upstream import FakeUpstream
+from jiosaavn_client import AsyncJioSaavnClient
+
+
+def test_radio_success_makes_no_artist_mix_calls():
+    with FakeUpstream(latency_ms=5, jitter_ms=0) as upstream:
+        async def run():
+            client = AsyncJioSaavnClient(base_url=upstream.base_url + "/api.php")
+            try:
+                seeds = [track["id"] for track in await client.search_songs("seed", size=10)]
+                for seed in seeds:
+                    assert await client.get_recommendations(seed)
+            finally:
+                await client.aclose()
+            return len(seeds)
+
+        count = asyncio.run(run())
+        calls = upstream.calls
+    # One radio call per seed; the artist mix (song details + search) is never started
+    assert calls.get("webradio.getSong") == count
+    assert calls.get("song.getDetails", 0) == 0
+    assert calls.get("search.getResults") == 1
+
+
+def test_artist_mix_hedges_a_failed_radio_call():
+    with FakeUpstream(latency_ms=5, jitter_ms=0) as upstream:
+        async def run():
+            client = AsyncJioSaavnClient(base_url=upstream.base_url + "/api.php")
+            get_json = client._get_json
+
+            async def no_radio(params, *args, **kwargs):
+                # Radio comes back empty; everything else goes upstream as usual
+                if params.get("__call") == "webradio.getSong":
+                    return {}
+                return await get_json(params, *args, **kwargs)
+
+            client._get_json = no_radio
+            try:
+                seed = (await client.search_songs("seed"))[0]
+                search_songs = client.search_songs
+                queries = []
+
+                async def record(query, *args, **kwargs):
+                    queries.append(query)
+                    return await search_songs(query, *args, **kwargs)
+
+                client.search_songs = record
+                return seed, queries, await client.get_recommendations(seed["id"])
+            finally:
+                await client.aclose()
+
+        seed, queries, tracks = asyncio.run(run())
+    assert tracks
+    # The artist mix answered, so the Viral Hits fallback was never needed
+    assert queries == [f"{seed['artist']} best songs"]
@@ -0,0 +1,28 @@
+import asyncio
+
+from stations import StationRegistry
+
+
+async def fetch(song_id):
+    # Deterministic recommendations: the same seed always gives the same tracks
+    return [{"id": f"{song_id}.{i}"} for i in range(10)]
+
+
+def test_stations_on_the_same_seed_are_independent():
+    async def run():
+        registry = StationRegistry(fetch)
+        first, second = registry.create("seed"), registry.create("seed")
+        a = await registry.get(first).take(3)
+        b = await registry.get(second).take(3)
+        more_a = await registry.get(first).take(2)
+        return first, second, a, b, more_a, len(registry)
+
+    first, second, a, b, more_a, count = asyncio.run(run())
+    assert first != second and count == 2
+    # The second listener's queue starts from the top instead of where the first left off
+    assert [t["id"] for t in a] == [t["id"] for t in b] == ["seed.0", "seed.1", "seed.2"]
+    assert [t["id"] for t in more_a] == ["seed.3", "seed.4"]
+
+
+def test_unknown_station_is_none():
+    assert StationRegistry(fetch).get("missing") is None